@@ -0,0 +1,78 @@
+import logging
+import sqlite3
+
+import news_store
+
+DAY = 86400
+
+
+# Daily rollup of article counts, kept current by a trigger on news
+def init_rollups(db_path=None):
+    """Create the rollup table and its triggers; an older database is rolled up once."""
+    try:
+        conn = news_store.get_connection(db_path)
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'news_daily_counts'").fetchone()
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS news_daily_counts
+                            (country TEXT, day INTEGER, political_bias TEXT, sentiment TEXT, count INTEGER NOT NULL,
+                             stories INTEGER NOT NULL DEFAULT 0,
+                             PRIMARY KEY (country, day, political_bias, sentiment))''')
+            outdated = 'stories' not in {row[1] for row in conn.execute('PRAGMA table_info(news_daily_counts)')}
+            if outdated:
+                conn.execute('ALTER TABLE news_daily_counts ADD COLUMN stories INTEGER NOT NULL DEFAULT 0')
+                conn.execute('DROP TRIGGER IF EXISTS news_daily_counts_insert')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_daily_counts_day ON news_daily_counts (day)')
+            # Runs inside the ingest transaction, so rollups and rows commit together.
+            # stories counts story representatives (story_id IS NULL), i.e. collapsed near-duplicates.
+            conn.execute('''CREATE TRIGGER IF NOT EXISTS news_daily_counts_insert AFTER INSERT ON news
+                            BEGIN
+                                INSERT INTO news_daily_counts (country, day, political_bias, sentiment, count, stories)
+                                VALUES (NEW.country, NEW.published_ts / 86400, NEW.political_bias, NEW.sentiment, 1,
+                                        NEW.story_id IS NULL)
+                                ON CONFLICT (country, day, political_bias, sentiment)
+                                DO UPDATE SET count = count + 1, stories = stories + excluded.stories;
+                            END''')
+            conn.execute('''CREATE TRIGGER IF NOT EXISTS news_daily_counts_story AFTER UPDATE OF story_id ON news
+                            WHEN OLD.story_id IS NULL AND NEW.story_id IS NOT NULL
+                            BEGIN
+                                UPDATE news_daily_counts SET stories = stories - 1
+                                WHERE country IS NEW.country AND day = NEW.published_ts / 86400
+                                  AND political_bias IS NEW.political_bias AND sentiment IS NEW.sentiment;
+                            END''')
+        if not exists or outdated:
+            rebuild_rollups(db_path)
+    except sqlite3.Error as e:
+        logging.error(f"Failed to initialize rollups: {e}")
+
+
+def rebuild_rollups(db_path=None):
+    """Recompute every rollup from news, e.g. after published_ts was backfilled."""
+    conn = news_store.get_connection(db_path)
+    with conn:
+        conn.execute('DELETE FROM news_daily_counts')
+        conn.execute('''INSERT INTO news_daily_counts (country, day, political_bias, sentiment, count, stories)
+                        SELECT country, published_ts / 86400, political_bias, sentiment, COUNT(*), SUM(story_id IS NULL)
+                        FROM news GROUP BY 1, 2, 3, 4''')
+
+
+def count_by(column, country=None, since=None, until=None, collapse=False, db_path=None):
+    """Return {value: count} of political_bias or sentiment for a day-aligned window.
+
+    since/until are epoch seconds, widened to whole UTC days. With collapse=True
+    near-duplicate copies of a story are counted once.
+    """
+    if column not in ('political_bias', 'sentiment', 'country'):
+        raise ValueError(f"Cannot aggregate by {column}")
+    query = f'SELECT {column}, SUM({"stories" if collapse else "count"}) FROM news_daily_counts WHERE 1 = 1'
+    params = []
+    if country:
+        query += ' AND country = ?'
+        params.append(country)
+    if since is not None:
+        query += ' AND day >= ?'
+        params.append(since // DAY)
+    if until is not None:
+        query += ' AND day < ?'
+        params.append(-(-until // DAY))
+    query += f' GROUP BY {column}'
+    return dict(news_store.get_connection(db_path).execute(query, params).fetchall())
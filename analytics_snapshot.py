@@ -0,0 +1,248 @@
+"""Columnar, memory-mapped snapshot of the news table for analytics.
+
+build_snapshot() writes one .npy file per column into a new version directory under
+SNAPSHOT_DIR and then points SNAPSHOT_DIR/CURRENT at it, so readers never see a half
+written snapshot. Country, political bias and sentiment are dictionary-encoded
+(int16 codes, -1 for NULL), published_ts is epoch seconds and titles are one UTF-8 blob
+plus offsets.
+
+load_snapshot() maps the files read-only (np.load(mmap_mode='r')), so opening a
+snapshot copies nothing and every process shares the page cache. Group-bys run as
+numpy mask + bincount over the code columns instead of Python loops over rows.
+
+A build reads the whole table, so it is not repeated for every derived-data update:
+refresh_snapshot() rebuilds only when the current snapshot is older than
+SNAPSHOT_INTERVAL and the data version of news.db has changed since it was taken. The
+derived-data update and a periodic job of the worker scheduler both call it, so the
+snapshot lags the database by about SNAPSHOT_INTERVAL. Builds are serialized with a lock
+file, so an older build can never finish last and move CURRENT backwards. The
+KEEP_VERSIONS newest versions are kept, because an open Snapshot maps titles.bin only
+when first used.
+
+    python analytics_snapshot.py [--db news.db] [--dir analytics_snapshot]
+"""
+import argparse
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+import news_store
+
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', 'analytics_snapshot')
+ENCODED_COLUMNS = ('country', 'political_bias', 'sentiment')
+BUILD_BATCH_SIZE = 50_000
+SNAPSHOT_INTERVAL = int(os.getenv('SNAPSHOT_INTERVAL', 900))  # seconds
+KEEP_VERSIONS = 2
+
+_lock = threading.Lock()
+_loaded = None
+
+
+def _current_path(directory):
+    return os.path.join(directory, 'CURRENT')
+
+
+def _current_meta(directory):
+    try:
+        with open(_current_path(directory)) as f:
+            version = f.read().strip()
+        with open(os.path.join(directory, version, 'meta.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def _build_lock(directory):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'BUILD_LOCK'), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def build_snapshot(db_path=None, directory=None):
+    """Write a new snapshot of every news row; returns its version directory name."""
+    directory = directory or SNAPSHOT_DIR
+    with _build_lock(directory):
+        return _build(db_path, directory)
+
+
+def _build(db_path, directory):
+    # Read before the rows, so rows stored during the build make the next refresh rebuild
+    data_version = news_store.data_version(db_path)
+    conn = news_store.get_connection(db_path)
+    dictionaries = {column: {} for column in ENCODED_COLUMNS}
+    columns = {name: [] for name in ('id', 'published_ts', 'topic_cluster', 'story_id', *ENCODED_COLUMNS)}
+    title_parts, title_lengths = [], []
+    last_id = 0
+    while True:
+        rows = conn.execute('''SELECT id, published_ts, topic_cluster, story_id, country, political_bias, sentiment,
+                                      COALESCE(title, '')
+                               FROM news WHERE id > ? ORDER BY id LIMIT ?''', (last_id, BUILD_BATCH_SIZE)).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        ids, published, clusters, stories, *encoded, titles = zip(*rows)
+        columns['id'].append(np.array(ids, dtype=np.int64))
+        columns['published_ts'].append(np.array([ts or 0 for ts in published], dtype=np.int64))
+        columns['topic_cluster'].append(np.array([-1 if c is None else c for c in clusters], dtype=np.int16))
+        columns['story_id'].append(np.array([-1 if s is None else s for s in stories], dtype=np.int64))
+        for column, values in zip(ENCODED_COLUMNS, encoded):
+            codes = dictionaries[column]
+            columns[column].append(np.array([-1 if value is None else codes.setdefault(value, len(codes))
+                                             for value in values], dtype=np.int16))
+        encoded_titles = [title.encode('utf-8') for title in titles]
+        title_parts.append(b''.join(encoded_titles))
+        title_lengths.append(np.array([len(title) for title in encoded_titles], dtype=np.int64))
+
+    # Builds hold the lock, so a stamp taken by the previous build can only be reused within its millisecond
+    stamp = int(time.time() * 1000)
+    while os.path.exists(os.path.join(directory, f'v{stamp}')):
+        stamp += 1
+    version = f'v{stamp}'
+    target = os.path.join(directory, version)
+    os.makedirs(target)
+    for name, parts in columns.items():
+        np.save(os.path.join(target, f'{name}.npy'), np.concatenate(parts) if parts else np.empty(0, np.int64))
+    lengths = np.concatenate(title_lengths) if title_lengths else np.empty(0, np.int64)
+    np.save(os.path.join(target, 'title_offsets.npy'), np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64))
+    with open(os.path.join(target, 'titles.bin'), 'wb') as f:
+        f.writelines(title_parts)
+    with open(os.path.join(target, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'built_at': time.time(), 'rows': int(lengths.size), 'max_id': last_id,
+                   'data_version': data_version,
+                   'dictionaries': {column: list(codes) for column, codes in dictionaries.items()}},
+                  f, ensure_ascii=False)
+
+    # Switch readers over atomically; the previous version stays for readers that still map it
+    tmp_path = f'{_current_path(directory)}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, _current_path(directory))
+    # Millisecond stamps of equal width sort chronologically
+    versions = sorted(name for name in os.listdir(directory) if name.startswith('v'))
+    for name in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    logging.info(f"Analytics snapshot {version}: {lengths.size} rows")
+    return version
+
+
+def refresh_snapshot(db_path=None, directory=None, max_age=SNAPSHOT_INTERVAL):
+    """Rebuild when the snapshot is older than max_age and the data changed; returns the new version or None."""
+    directory = directory or SNAPSHOT_DIR
+    if not _stale(db_path, directory, max_age):
+        return None
+    with _build_lock(directory):
+        # A concurrent refresh may have rebuilt while this one waited for the lock
+        if not _stale(db_path, directory, max_age):
+            return None
+        return _build(db_path, directory)
+
+
+def _stale(db_path, directory, max_age):
+    meta = _current_meta(directory)
+    return not meta or (time.time() - meta['built_at'] >= max_age
+                        and meta.get('data_version') != news_store.data_version(db_path))
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of one snapshot version."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.version = self.meta['version']
+        self.dictionaries = self.meta['dictionaries']
+        for name in ('id', 'published_ts', 'topic_cluster', 'story_id', 'title_offsets', *ENCODED_COLUMNS):
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r'))
+        self._titles = None
+
+    def __len__(self):
+        return len(self.id)
+
+    def mask(self, country=None, since=None, until=None, collapse=False):
+        """Boolean row mask for the usual filters (since/until are epoch seconds)."""
+        selected = np.ones(len(self), dtype=bool)
+        if country:
+            code = self.code('country', country)
+            selected &= self.country == code
+        if since is not None:
+            selected &= self.published_ts >= since
+        if until is not None:
+            selected &= self.published_ts < until
+        if collapse:
+            selected &= self.story_id < 0
+        return selected
+
+    def code(self, column, value):
+        try:
+            return self.dictionaries[column].index(value)
+        except ValueError:
+            return -2  # matches no row
+
+    def count_by(self, column, selected=None):
+        """{value: count} of a dictionary-encoded column over the selected rows."""
+        codes = np.asarray(getattr(self, column))
+        if selected is not None:
+            codes = codes[selected]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.dictionaries[column]))
+        return {value: int(count) for value, count in zip(self.dictionaries[column], counts) if count}
+
+    def titles(self, rows):
+        """Decoded titles of the given row indices (or boolean mask)."""
+        if self._titles is None:
+            self._titles = np.memmap(os.path.join(self.path, 'titles.bin'), dtype=np.uint8, mode='r') \
+                if self.title_offsets[-1] else np.empty(0, np.uint8)
+        rows = np.flatnonzero(rows) if np.asarray(rows).dtype == bool else rows
+        return [bytes(self._titles[self.title_offsets[row]:self.title_offsets[row + 1]]).decode('utf-8')
+                for row in rows]
+
+    def clusters(self, limit=None):
+        """(titles, labels) of the newest limit clustered articles, in id order, like topic_clustering.load_clusters."""
+        selected = np.flatnonzero(np.asarray(self.topic_cluster) >= 0)
+        if limit is not None:
+            selected = selected[-limit:] if limit else selected[:0]
+        return self.titles(selected), np.asarray(self.topic_cluster[selected])
+
+
+def load_snapshot(directory=None):
+    """The current snapshot, or None before the first build; reopened only when CURRENT changes."""
+    global _loaded
+    directory = directory or SNAPSHOT_DIR
+    try:
+        with open(_current_path(directory)) as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    with _lock:
+        if _loaded is None or _loaded.path != os.path.join(directory, version):
+            try:
+                _loaded = Snapshot(os.path.join(directory, version))
+            except OSError as e:
+                logging.error(f"Failed to open analytics snapshot {version}: {e}")
+                return None
+        return _loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the analytics snapshot from news.db.')
+    parser.add_argument('--db', default=None)
+    parser.add_argument('--dir', default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    build_snapshot(args.db, args.dir)
+
+
+if __name__ == '__main__':
+    main()
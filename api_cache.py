@@ -0,0 +1,103 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import news_store
+
+DEFAULT_TTL = 300  # seconds
+
+
+class ResponseCache:
+    """Caches serialized API responses in Redis, or in process memory when Redis is down.
+
+    Every key embeds the current data version, which lives in news.db (news_store.data_version)
+    so the web and ingest processes share it; an ingest run that commits new rows bumps
+    it in the same transaction, so stale responses are never served and simply expire.
+    """
+
+    def __init__(self, client=None, ttl=DEFAULT_TTL, max_local_entries=1024, client_factory=None):
+        self.client = client
+        self.client_factory = client_factory
+        self.ttl = ttl
+        self.max_local_entries = max_local_entries
+        self.local = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis_retry_at = 0.0
+
+    def _redis(self):
+        # After a failure Redis is skipped for a while instead of paying a timeout per request
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        if self.client is None and self.client_factory is not None:
+            try:
+                self.client = self.client_factory()
+            except Exception as e:
+                self._redis_failed(e)
+            finally:
+                self.client_factory = None
+        return self.client
+
+    def _redis_failed(self, e):
+        logging.warning(f"Redis unavailable, using in-memory response cache: {e}")
+        self._redis_retry_at = time.monotonic() + 30
+
+    def version(self):
+        return news_store.data_version()
+
+    def bump_version(self):
+        news_store.bump_data_version()
+        with self._lock:
+            self.local.clear()
+
+    def key(self, namespace, args):
+        """Build a cache key from a route name and its (multi)dict of query arguments."""
+        items = sorted((name, value) for name in args for value in args.getlist(name)) \
+            if hasattr(args, 'getlist') else sorted(args.items())
+        digest = hashlib.sha1(repr(items).encode('utf-8')).hexdigest()
+        return f'insighthub:{namespace}:{self.version()}:{digest}'
+
+    def get(self, key):
+        client = self._redis()
+        if client is not None:
+            try:
+                value = client.get(key)
+                return value.decode('utf-8') if isinstance(value, bytes) else value
+            except Exception as e:
+                self._redis_failed(e)
+        with self._lock:
+            entry = self.local.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.local[key]
+                return None
+            self.local.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        client = self._redis()
+        if client is not None:
+            try:
+                client.setex(key, self.ttl, value)
+                return
+            except Exception as e:
+                self._redis_failed(e)
+        with self._lock:
+            self.local[key] = (value, time.monotonic() + self.ttl)
+            self.local.move_to_end(key)
+            while len(self.local) > self.max_local_entries:
+                self.local.popitem(last=False)
+
+
+def redis_client():
+    import redis
+    return redis.StrictRedis(host=os.getenv('REDIS_HOST', 'localhost'), port=int(os.getenv('REDIS_PORT', 6379)), db=0,
+                             socket_timeout=0.5, socket_connect_timeout=0.5)
+
+
+# Shared by the web tier and the ingest worker; redis is imported on first use
+response_cache = ResponseCache(client_factory=redis_client)
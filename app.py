@@ -1,132 +1,81 @@
-import sqlite3
+import hashlib
+import hmac
+import json
 import logging
-import feedparser
-from flask import Flask, render_template, request, jsonify
-from apscheduler.schedulers.background import BackgroundScheduler
-from transformers import pipeline
-import torch
-from langdetect import detect
-import openai
+import time
+from datetime import datetime, timezone
+from flask import Flask, Response, g, redirect, render_template, request, jsonify, stream_with_context
 from dotenv import load_dotenv
 import os
+import sqlite3
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-import redis
+import news_store
+from news_store import init_db
+from api_cache import response_cache
+import export
+import aggregates
+import feed_registry
+import job_queue
+import language
+import metrics
+import near_duplicates
+import poll_schedule
+import search_index
+import user_settings
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize OpenAI API
-api_key = os.getenv('OPENAI_API_KEY')
-if not api_key:
-    raise ValueError("API key for OpenAI is not set. Please set the OPENAI_API_KEY environment variable.")
-openai.api_key = api_key
-
 # Flask application initialization
 app = Flask(__name__, static_folder='static', static_url_path='')
 
 # Limiter for API rate limiting
 limiter = Limiter(get_remote_address, app=app, default_limits=["100 per hour"])
 
-# Redis for caching
-cache = redis.StrictRedis(host='localhost', port=6379, db=0)
-
 # Modern UI with Bootstrap
 app.config['BOOTSTRAP_SERVE_LOCAL'] = True
 
 # Enhanced logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
 
-# Translation function with batch processing
-def translate_texts(texts, target_language='hu'):
-    translated_texts = []
-    for text in texts:
-        try:
-            response = openai.Completion.create(
-                model="text-davinci-003",
-                prompt=f"Translate the following text to {target_language}: {text}",
-                max_tokens=100
-            )
-            translated_texts.append(response.choices[0].text.strip())
-        except Exception as e:
-            logging.error(f"Translation failed for text: {text}, error: {e}")
-            translated_texts.append(text)  # Fallback to original text
-    return translated_texts
-
-# BERT sentiment analyzer setup
-def setup_sentiment_analyzer():
-    device = 0 if torch.cuda.is_available() else -1  # Use GPU if available, otherwise CPU
-    return pipeline('sentiment-analysis', model='nlptown/bert-base-multilingual-uncased-sentiment', device=device)
-
-bert_analyzer = setup_sentiment_analyzer()
-
-# Database initialization with indexing
-def init_db():
-    try:
-        with sqlite3.connect('news.db') as conn:
-            c = conn.cursor()
-            c.execute('''CREATE TABLE IF NOT EXISTS news
-                         (id INTEGER PRIMARY KEY, country TEXT, title TEXT, link TEXT UNIQUE, published TEXT, sentiment TEXT, 
-                          political_bias TEXT)''')
-            c.execute('CREATE INDEX IF NOT EXISTS idx_country ON news (country)')
-            c.execute('CREATE INDEX IF NOT EXISTS idx_published ON news (published)')
-            conn.commit()
-    except sqlite3.Error as e:
-        logging.error(f"Failed to initialize database: {e}")
-
-# Save news to the database
-def save_news(news):
-    try:
-        with sqlite3.connect('news.db') as conn:
-            c = conn.cursor()
-            c.execute('''INSERT OR IGNORE INTO news (country, title, link, published, sentiment, political_bias)
-                         VALUES (?, ?, ?, ?, ?, ?)''',
-                      (news['country'], news['title'], news['link'], news['published'], news['sentiment'], news['political_bias']))
-            conn.commit()
-    except sqlite3.Error as e:
-        logging.error(f"Failed to save news: {e}")
-
-# Determine political bias
-def determine_political_bias(text):
-    return 'right' if 'jobboldal' in text.lower() else 'left'
-
-# Fetch and process RSS feeds
-def fetch_and_process_feeds():
-    for country, feeds in rss_feeds.items():
-        for feed_url in feeds:
-            try:
-                feed = feedparser.parse(feed_url)
-                titles = [entry.title for entry in feed.entries]
-                translated_titles = translate_texts(titles)
-
-                for entry, translated_title in zip(feed.entries, translated_titles):
-                    news = {
-                        'country': country,
-                        'title': translated_title,
-                        'link': entry.link,
-                        'published': entry.get('published', 'unknown'),
-                        'sentiment': bert_analyzer(translated_title)[0]['label'],
-                        'political_bias': determine_political_bias(translated_title),
-                    }
-                    save_news(news)
-            except Exception as e:
-                logging.error(f"Failed to fetch/process RSS feed: {feed_url}, error: {e}")
-
 # Visualization with Plotly
-def create_interactive_graph():
-    import plotly.graph_objects as go
-    from collections import Counter
+def day_window(since, until):
+    """Widen since/until to whole UTC days, the resolution of the rollups."""
+    if since is not None:
+        since -= since % aggregates.DAY
+    if until is not None:
+        until = -(-until // aggregates.DAY) * aggregates.DAY
+    return since, until
 
-    with sqlite3.connect('news.db') as conn:
-        c = conn.cursor()
-        c.execute('SELECT country, political_bias, sentiment FROM news')
-        news_data = c.fetchall()
+def create_interactive_graph(country=None, since=None, until=None, collapse=False):
+    """Plotly div of the bias and sentiment counts, or None when the window has no articles.
 
-    if not news_data:
+    The div is cached per day-aligned window and snapshot (or, without one, data) version;
+    plotly.js comes from the CDN in the template, so an entry is a few kilobytes.
+    """
+    import analytics_snapshot
+
+    since, until = day_window(since, until)
+    snapshot = analytics_snapshot.load_snapshot()
+    key = response_cache.key(f'graph_{snapshot.version if snapshot else "rollups"}',
+                             {'country': country or '', 'since': since, 'until': until, 'collapse': collapse})
+    div = response_cache.get(key)
+    if div is not None:
+        return div
+
+    # Vectorized group-bys over the memory-mapped snapshot; the daily rollups until the first one is built
+    if snapshot:
+        selected = snapshot.mask(country, since, until, collapse)
+        bias_counts = snapshot.count_by('political_bias', selected)
+        sentiment_counts = snapshot.count_by('sentiment', selected)
+    else:
+        bias_counts = aggregates.count_by('political_bias', country, since, until, collapse)
+        sentiment_counts = aggregates.count_by('sentiment', country, since, until, collapse)
+    if not bias_counts:
         return None
 
-    bias_counts = Counter([item[1] for item in news_data])
-    sentiment_counts = Counter([item[2] for item in news_data])
+    import plotly.graph_objects as go
 
     fig = go.Figure()
     fig.add_trace(go.Bar(x=list(bias_counts.keys()), y=list(bias_counts.values()), name='Political Bias'))
@@ -138,47 +87,300 @@ def create_interactive_graph():
         xaxis_title='Category',
         yaxis_title='Count'
     )
-    fig.write_html('static/graph.html')
-    return 'static/graph.html'
+    div = fig.to_html(full_html=False, include_plotlyjs=False)
+    response_cache.set(key, div)
+    return div
 
 # Initialize the database
 init_db()
+aggregates.init_rollups()
+near_duplicates.init_index()
+search_index.init_search()
+poll_schedule.init_schedule()
+feed_registry.init_registry()
+language.init_languages()
+
+# Ingest normally runs in `python worker.py`, which queues per-feed jobs and elects one
+# scheduler. INGEST_IN_WEB=1 runs it in-process instead (single-process development only:
+# under gunicorn every web worker would start its own scheduler).
+def run_ingest():
+    from ingest import fetch_and_process_feeds
+    return fetch_and_process_feeds()
+
+if os.getenv('INGEST_IN_WEB', '0') == '1':
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(run_ingest, 'interval', hours=1)
+    scheduler.start()
+
+# Request latency per route; flushed to the shared metrics store every few seconds
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    if 'request_started' in g:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe('http_request_seconds', time.perf_counter() - g.request_started,
+                        route=route, method=request.method, status=str(response.status_code))
+        metrics.maybe_flush()
+    return response
+
+# Query argument parsing; SQLite integers are 64-bit, larger values would raise OverflowError
+MAX_TIMESTAMP = 253402300799  # 9999-12-31T23:59:59Z, the last instant fromisoformat accepts
+MAX_ROW_ID = 2 ** 63 - 1
+
+def parse_time_arg(value):
+    """Accept UTC epoch seconds or an ISO-8601 date/datetime."""
+    if value.isdigit():
+        timestamp = int(value)
+    else:
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        timestamp = int(parsed.timestamp())
+    if not 0 <= timestamp <= MAX_TIMESTAMP:
+        raise ValueError("time must be between 1970-01-01 and 9999-12-31")
+    return timestamp
+
+# Server-rendered pages: rendered once per country and data version, repeat views revalidate with the ETag
+PAGE_SIZE = 50
+
+def cached_page(template, key_args, context):
+    # The key embeds the data version kept in news.db, so every web process derives the same ETag
+    # and an insert committed by any ingest process changes it
+    key = response_cache.key(f'page_{template}', key_args)
+    etag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        body = response_cache.get(key)
+        if body is None:
+            body = render_template(template, **context())
+            response_cache.set(key, body)
+        response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # always revalidate: an ingest run may have changed the page
+    return response
 
-# Scheduler setup for periodic news fetching
-scheduler = BackgroundScheduler()
-scheduler.add_job(fetch_and_process_feeds, 'interval', hours=1)
-scheduler.start()
+def page_country():
+    # No argument means the saved setting; an empty one (the "all" option) means every country
+    country = request.args.get('country')
+    return user_settings.load_settings() if country is None else country
+
+def latest_news(country):
+    items, _ = news_store.query_news(country=country or None, fields=('country', 'title', 'link', 'published'),
+                                     limit=PAGE_SIZE)
+    return items
 
 # Flask routes
 @app.route("/")
 def home():
-    return render_template('index.html')
+    country = page_country()
+    return cached_page('index.html', {'country': country}, lambda: {'news': latest_news(country)})
+
+@app.route("/news")
+def news_page():
+    country = page_country()
+    return cached_page('news.html', {'country': country},
+                       lambda: {'news': [item['title'] for item in latest_news(country)]})
+
+@app.route("/google_news")
+def google_news_page():
+    country = page_country()
+    # The country list comes from the feed registry, which changes independently of the news data
+    return cached_page('google_news.html', {'country': country, 'feeds': feed_registry.version()},
+                       lambda: {'news': latest_news(country), 'countries': feed_registry.load_countries(),
+                                'selected_country': country})
+
+# The saved country is the default of every visitor, so changing it needs the admin token;
+# a header token is never attached by the browser, which also keeps cross-site form posts out
+@app.route("/settings", methods=['GET', 'POST'])
+@limiter.limit("10 per minute", methods=['POST'])
+def settings_page():
+    if request.method == 'POST':
+        if not admin_authorized():
+            return "Admin token required", 403
+        country = request.form.get('country', '').strip()
+        if country not in feed_registry.load_countries():
+            return "Unknown country", 400
+        user_settings.save_settings(country)
+        return redirect('/')
+    return cached_page('settings.html', {}, dict)
 
 @app.route("/visualization")
 def visualization():
-    graph_url = create_interactive_graph()
-    if graph_url:
-        return render_template('visualization.html', graph_url=graph_url)
+    try:
+        since = parse_time_arg(request.args['since']) if request.args.get('since') else None
+        until = parse_time_arg(request.args['until']) if request.args.get('until') else None
+    except ValueError as e:
+        return f"Invalid time range: {e}", 400
+    plot_div = create_interactive_graph(request.args.get('country'), since, until,
+                                        collapse=request.args.get('collapse') == '1')
+    if plot_div:
+        return render_template('visualization.html', plot_div=plot_div)
     else:
         return "No data available for visualization."
 
+# Query argument parsing for /api/news
+MAX_PAGE_SIZE = 1000
+
+def parse_news_args(args):
+    fields = tuple(args.get('fields', '').split(',')) if args.get('fields') else news_store.API_FIELDS
+    unknown = set(fields) - set(news_store.API_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    limit = int(args.get('limit', 100))
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return {
+        'country': args.get('country'),
+        'sentiment': args.get('sentiment'),
+        'political_bias': args.get('political_bias'),
+        'collapse': args.get('collapse') == '1',
+        'since': parse_time_arg(args['since']) if args.get('since') else None,
+        'until': parse_time_arg(args['until']) if args.get('until') else None,
+        'fields': fields,
+        'limit': limit,
+        'cursor': args.get('cursor'),
+    }
+
 @app.route("/api/news", methods=['GET'])
 @limiter.limit("10 per minute")
 def api_news():
-    country = request.args.get('country')
-    query = 'SELECT country, title, link, published, sentiment, political_bias FROM news'
-    params = ()
+    try:
+        query = parse_news_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    key = response_cache.key('api_news', request.args)
+    body = response_cache.get(key)
+    if body is None:
+        try:
+            items, next_cursor = news_store.query_news(**query)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        body = json.dumps({'items': items, 'next_cursor': next_cursor}, ensure_ascii=False)
+        response_cache.set(key, body)
+    return app.response_class(body, mimetype='application/json')
 
-    if country:
-        query += ' WHERE country = ?'
-        params = (country,)
+# Full-text search over the archive
+@app.route("/api/search", methods=['GET'])
+@limiter.limit("30 per minute")
+def api_search():
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({'error': "q is required"}), 400
+    try:
+        limit = int(request.args.get('limit', 20))
+        page = int(request.args.get('page', 1))
+        since = parse_time_arg(request.args['since']) if request.args.get('since') else None
+        until = parse_time_arg(request.args['until']) if request.args.get('until') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not 0 < limit <= search_index.MAX_PAGE_SIZE or page < 1:
+        return jsonify({'error': f"limit must be between 1 and {search_index.MAX_PAGE_SIZE}, page at least 1"}), 400
+    # Also keeps OFFSET far inside SQLite's 64-bit integers
+    if page * limit > search_index.MAX_RESULTS:
+        return jsonify({'error': f"Only the first {search_index.MAX_RESULTS} matches can be paged through"}), 400
+
+    key = response_cache.key('api_search', request.args)
+    body = response_cache.get(key)
+    if body is None:
+        items = search_index.search(text, request.args.get('country'), since, until, limit, page)
+        more = len(items) == limit and (page + 1) * limit <= search_index.MAX_RESULTS
+        body = json.dumps({'items': items, 'page': page, 'next_page': page + 1 if more else None}, ensure_ascii=False)
+        response_cache.set(key, body)
+    return app.response_class(body, mimetype='application/json')
+
+# Prometheus scrape endpoint: ingest stage timings, cache hit ratios, queue depth, route latency
+@app.route("/metrics")
+@limiter.exempt
+def metrics_endpoint():
+    try:
+        conn = job_queue.connect_readonly()
+        try:
+            depth = job_queue.depth(conn)
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        depth = {}  # no worker has created the queue yet
+    gauges = [('job_queue_depth', {'status': status}, depth.get(status, 0)) for status in ('queued', 'leased')]
+    return Response(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+# Adaptive polling schedule, soonest first
+@app.route("/api/feeds/schedule", methods=['GET'])
+def api_feed_schedule():
+    return jsonify({'feeds': poll_schedule.next_polls()})
 
-    with sqlite3.connect('news.db') as conn:
-        c = conn.cursor()
-        c.execute(query, params)
-        news_items = c.fetchall()
+# Feed registry administration; disabled unless ADMIN_TOKEN is set
+def admin_authorized():
+    token = os.getenv('ADMIN_TOKEN')
+    # Constant-time comparison, so response timing does not leak the token prefix
+    return bool(token) and hmac.compare_digest(request.headers.get('Authorization', '').encode('utf-8'),
+                                               f'Bearer {token}'.encode('utf-8'))
+
+@app.route("/api/admin/feeds", methods=['GET', 'POST'])
+def api_admin_feeds():
+    if not admin_authorized():
+        return jsonify({'error': "Admin token required"}), 403
+    if request.method == 'GET':
+        return jsonify({'feeds': feed_registry.list_feeds()})
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': "Body must be a JSON object"}), 400
+    if not all(isinstance(data.get(field), str) and data[field].strip() for field in ('url', 'country')):
+        return jsonify({'error': "url and country are required"}), 400
+    feed_id = feed_registry.add_feed(data['url'], data['country'])
+    if feed_id is None:
+        return jsonify({'error': "Feed already registered"}), 409
+    return jsonify({'id': feed_id}), 201
+
+@app.route("/api/admin/feeds/<int:feed_id>", methods=['PATCH', 'DELETE'])
+def api_admin_feed(feed_id):
+    if not admin_authorized():
+        return jsonify({'error': "Admin token required"}), 403
+    if request.method == 'DELETE':
+        found = feed_registry.remove_feed(feed_id)
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': "Body must be a JSON object"}), 400
+        try:
+            found = feed_registry.update_feed(feed_id, data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except sqlite3.IntegrityError:
+            return jsonify({'error': "Feed already registered"}), 409
+    if not found:
+        return jsonify({'error': "Unknown feed"}), 404
+    return '', 204
+
+# Streaming export for bulk consumers; resume with ?after=<last id>
+@app.route("/api/news/export", methods=['GET'])
+@limiter.limit("10 per hour")
+def api_news_export():
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': f"Unknown export format: {fmt}"}), 400
+    try:
+        after = int(request.args.get('after', 0))
+        if not 0 <= after <= MAX_ROW_ID:
+            raise ValueError(after)
+    except ValueError:
+        return jsonify({'error': "after must be an article id"}), 400
+    # accept_encodings honours q-values, so "gzip;q=0" is a refusal
+    use_gzip = request.args.get('gzip') == '1' or request.accept_encodings['gzip'] > 0
 
-    return jsonify(news_items)
+    rows = export.iter_rows(country=request.args.get('country'), after=after)
+    response = Response(stream_with_context(export.encode_rows(rows, fmt, gzip=use_gzip)),
+                        mimetype='application/x-ndjson' if fmt == 'ndjson' else 'text/csv')
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
 
 # Run the Flask application
 if __name__ == "__main__":
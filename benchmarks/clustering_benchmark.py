@@ -0,0 +1,66 @@
+"""Full TF-IDF + KMeans refit vs. one incremental topic-model update.
+
+    python -m benchmarks.clustering_benchmark --sizes 10000 100000 1000000 --new 1000
+"""
+import argparse
+import json
+import random
+import time
+
+from topic_clustering import NUM_CLUSTERS, TopicModel
+
+WORDS = ('election government minister budget football match championship storm flood weather '
+         'police court trial hospital health vaccine market inflation bank energy gas price '
+         'school teacher students concert festival film music border migration army war peace').split()
+
+
+def synthetic_titles(count, seed=42):
+    rng = random.Random(seed)
+    return [' '.join(rng.choices(WORDS, k=rng.randint(5, 12))) for _ in range(count)]
+
+
+def full_refit(titles):
+    # What v1.perform_kmeans_clustering does on every /visualize request
+    from sklearn.cluster import KMeans
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    X = TfidfVectorizer(stop_words='english').fit_transform(titles)
+    return KMeans(n_clusters=NUM_CLUSTERS, random_state=42).fit(X).labels_
+
+
+def incremental_model(titles, batch_size=5000):
+    model = TopicModel()
+    for start in range(0, len(titles), batch_size):
+        model.partial_fit(titles[start:start + batch_size])
+    return model
+
+
+def run(size, new):
+    titles = synthetic_titles(size)
+    new_titles = synthetic_titles(new, seed=size)
+
+    started = time.perf_counter()
+    full_refit(titles + new_titles)
+    refit_seconds = time.perf_counter() - started
+
+    model = incremental_model(titles)
+    started = time.perf_counter()
+    model.partial_fit(new_titles)
+    update_seconds = time.perf_counter() - started
+
+    return {'titles': size, 'new_titles': new, 'full_refit_seconds': round(refit_seconds, 3),
+            'incremental_update_seconds': round(update_seconds, 4),
+            'speedup': round(refit_seconds / update_seconds, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--new', type=int, default=1000, help='titles added by one ingest run')
+    args = parser.parse_args()
+    for size in args.sizes:
+        print(json.dumps(run(size, args.new)))
+
+
+if __name__ == '__main__':
+    main()
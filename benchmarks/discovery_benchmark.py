@@ -0,0 +1,96 @@
+"""Feed discovery against a local HTTP fixture server.
+
+Serves a mix of real feeds, HTML pages that advertise a feed through
+<link rel="alternate">, plain HTML pages, 404s and slow responses, then validates
+all of them with feed_discovery.discover.
+
+    python -m benchmarks.discovery_benchmark --candidates 400 --delay 0.2
+"""
+import argparse
+import json
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import feed_discovery
+
+KINDS = ('feed', 'page', 'plain', 'missing', 'slow')
+
+
+def feed_xml(index, items=20):
+    now = time.time()
+    entries = ''.join(f'<item><title>Story {index}-{i}</title><link>http://example.com/{index}/{i}</link>'
+                      f'<pubDate>{formatdate(now - i * 900 * (index % 7 + 1))}</pubDate></item>'
+                      for i in range(items))
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed {index}</title>{entries}</channel></rss>'
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    delay = 0.2
+
+    def do_GET(self):
+        _, kind, name = self.path.split('/')
+        index = int(name.split('.')[0])
+        if kind == 'slow':
+            time.sleep(self.delay)
+            kind = 'feed'
+        if kind in ('feed', 'alt'):
+            self._send(feed_xml(index), 'application/rss+xml')
+        elif kind == 'page':
+            self._send(f'<html><head><link rel="alternate" type="application/rss+xml" href="/alt/{index}.xml">'
+                       f'</head><body>News {index}</body></html>', 'text/html')
+        elif kind == 'plain':
+            self._send(f'<html><body>What is RSS? {index}</body></html>', 'text/html')
+        else:
+            self.send_error(404)
+
+    def _send(self, body, content_type):
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(delay):
+    FixtureHandler.delay = delay
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(candidates, delay, max_workers, per_host_limit):
+    server = serve(delay)
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    urls = [f'{base}/{KINDS[i % len(KINDS)]}/{i}.xml' for i in range(candidates)]
+    try:
+        started = time.perf_counter()
+        feeds = feed_discovery.discover(urls, max_workers=max_workers, per_host_limit=per_host_limit)
+        seconds = time.perf_counter() - started
+    finally:
+        server.shutdown()
+    expected = sum(KINDS[i % len(KINDS)] in ('feed', 'page', 'slow') for i in range(candidates))
+    return {'candidates': candidates, 'feeds_found': len(feeds), 'feeds_expected': expected,
+            'seconds': round(seconds, 3), 'candidates_per_second': round(candidates / seconds, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candidates', type=int, nargs='+', default=[100, 400])
+    parser.add_argument('--delay', type=float, default=0.2, help='seconds a slow candidate takes to answer')
+    parser.add_argument('--max-workers', type=int, default=feed_discovery.MAX_WORKERS)
+    parser.add_argument('--per-host-limit', type=int, default=feed_discovery.MAX_WORKERS,
+                        help='the fixture server is a single host')
+    args = parser.parse_args()
+    for candidates in args.candidates:
+        print(json.dumps(run(candidates, args.delay, args.max_workers, args.per_host_limit)))
+
+
+if __name__ == '__main__':
+    main()
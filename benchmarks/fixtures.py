@@ -0,0 +1,158 @@
+"""Offline fixtures shared by the benchmarks: synthetic records, a local feed server and stub backends.
+
+Nothing here talks to live feeds, OpenAI, Google or a model; latencies are simulated
+so runs are reproducible and comparable between commits.
+"""
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+SENTIMENT_LABELS = ('1 star', '2 stars', '3 stars', '4 stars', '5 stars')
+BIASES = ('left', 'right')
+
+
+def load_records(path='news_data.json'):
+    """The news_data.json sample: one {country, title, link, published} record per line."""
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_records(count, seed=42, base=None, days=90):
+    """count records shaped like news_data.json with unique links and titles spread over days."""
+    base = base or load_records()
+    rng = random.Random(seed)
+    now = time.time()
+    records = []
+    for index in range(count):
+        sample = base[index % len(base)]
+        records.append({
+            'country': sample['country'],
+            'title': f"{sample['title']} ({index})",
+            'link': f"{sample['link'].rstrip('/')}/{seed}-{index}",
+            'published': formatdate(now - rng.uniform(0, days * 86400)),
+            'sentiment': rng.choice(SENTIMENT_LABELS),
+            'political_bias': rng.choice(BIASES),
+        })
+    return records
+
+
+def feed_xml(records, title='Benchmark feed'):
+    items = ''.join(f"<item><title>{escape(record['title'])}</title><link>{escape(record['link'])}</link>"
+                    f"<pubDate>{record['published']}</pubDate></item>" for record in records)
+    return (f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>{escape(title)}</title>'
+            f'{items}</channel></rss>').encode('utf-8')
+
+
+class FeedServer:
+    """Serves /feed/<n>.xml on 127.0.0.1 from a list of per-feed record lists.
+
+    Like a real feed host, every response carries an ETag and a Last-Modified header, and
+    a conditional GET whose validators still match is answered 304 without a body
+    (If-None-Match takes precedence over If-Modified-Since). update() replaces a feed's
+    records; responses counts the status codes sent.
+    """
+
+    def __init__(self, feeds, latency=0.0):
+        self.feeds = []
+        self.responses = Counter()
+        for records in feeds:
+            self.update(len(self.feeds), records)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                try:
+                    body, etag, last_modified = server.feeds[int(self.path.rsplit('/', 1)[-1].split('.')[0])]
+                except (ValueError, IndexError):
+                    self.send_error(404)
+                    return
+                if latency:
+                    time.sleep(latency)
+                status = 304 if server.not_modified(self.headers, etag, last_modified) else 200
+                server.responses[status] += 1
+                self.send_response(status)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', last_modified)
+                if status == 304:
+                    self.end_headers()
+                    return
+                self.send_header('Content-Type', 'application/rss+xml')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.urls = [f'http://127.0.0.1:{self.server.server_address[1]}/feed/{index}.xml'
+                     for index in range(len(feeds))]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def update(self, index, records):
+        body = feed_xml(records, f'Feed {index}')
+        feed = (body, f'"{hashlib.sha1(body).hexdigest()[:16]}"', formatdate(usegmt=True))
+        if index < len(self.feeds):
+            self.feeds[index] = feed
+        else:
+            self.feeds.append(feed)
+
+    @staticmethod
+    def not_modified(headers, etag, last_modified):
+        if headers.get('If-None-Match') is not None:
+            return etag in (tag.strip() for tag in headers['If-None-Match'].split(','))
+        if headers.get('If-Modified-Since') is not None:
+            try:
+                return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(headers['If-Modified-Since'])
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubSentimentAnalyzer:
+    """Stands in for the transformers pipeline: deterministic labels, simulated latency."""
+
+    def __init__(self, batch_latency=0.0, item_latency=0.0):
+        self.batch_latency = batch_latency
+        self.item_latency = item_latency
+        self.calls = 0
+
+    def __call__(self, texts, batch_size=None, truncation=True):
+        self.calls += 1
+        time.sleep(self.batch_latency + self.item_latency * len(texts))
+        return [{'label': SENTIMENT_LABELS[hashlib.sha1(text.encode('utf-8')).digest()[0] % len(SENTIMENT_LABELS)],
+                 'score': 1.0} for text in texts]
+
+
+def isolated_environment():
+    """Point every database, cache and rendered file at a fresh temporary directory.
+
+    Must run before news_store, ingest or app are imported, since they read these
+    variables at import time. Returns the directory.
+    """
+    directory = tempfile.mkdtemp(prefix='insighthub-bench-')
+    os.environ.update({
+        'NEWS_DB_PATH': os.path.join(directory, 'news.db'),
+        'TRANSLATION_CACHE_PATH': os.path.join(directory, 'translation_cache.db'),
+        'TOPIC_MODEL_PATH': os.path.join(directory, 'topic_model.pkl'),
+        'METRICS_PATH': os.path.join(directory, 'metrics.db'),
+        'JOB_QUEUE_PATH': os.path.join(directory, 'jobs.db'),
+        'SNAPSHOT_DIR': os.path.join(directory, 'analytics_snapshot'),
+        'SOCIAL_GRAPH_DIR': os.path.join(directory, 'social_graph'),
+        'USER_SETTINGS_PATH': os.path.join(directory, 'user_settings.json'),
+        'INGEST_IN_WEB': '0',
+    })
+    return directory
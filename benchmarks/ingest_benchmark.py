@@ -0,0 +1,86 @@
+"""End-to-end ingest throughput and save_news write throughput, fully offline.
+
+Feeds are served from a local HTTP server seeded with news_data.json-style records;
+translation and sentiment use stub backends with configurable latency.
+
+    python -m benchmarks.ingest_benchmark --feeds 20 --items 100 --translate-latency 0.05 --sentiment-latency 0.01
+"""
+import argparse
+import json
+import time
+
+from benchmarks.fixtures import FeedServer, StubSentimentAnalyzer, isolated_environment, synthetic_records
+
+
+def setup_ingest(translate_latency, sentiment_latency, translate_batch_size=50):
+    import feed_fetcher
+    import ingest
+    from sentiment import SentimentScorer
+    from translation import BatchTranslator, FakeBackend
+
+    for init in (ingest.news_store.init_db, ingest.aggregates.init_rollups, ingest.near_duplicates.init_index,
+                 ingest.search_index.init_search, ingest.poll_schedule.init_schedule, ingest.feed_registry.init_registry,
+                 ingest.language.init_languages, feed_fetcher.init_validators):
+        init()
+    ingest._translator = BatchTranslator(FakeBackend(latency=translate_latency, batch_size=translate_batch_size))
+    ingest._sentiment_scorer = SentimentScorer(StubSentimentAnalyzer(batch_latency=sentiment_latency))
+    return ingest
+
+
+def run_end_to_end(ingest, feeds, items, server_latency):
+    records = synthetic_records(feeds * items, seed=feeds)
+    server = FeedServer([records[index::feeds] for index in range(feeds)], latency=server_latency)
+    try:
+        registry = {'Benchmark': server.urls}
+        started = time.perf_counter()
+        stats = ingest.fetch_and_process_feeds(registry)
+        cold = time.perf_counter() - started
+        # Second run: the feeds are unchanged, so every conditional GET is answered 304
+        started = time.perf_counter()
+        ingest.fetch_and_process_feeds(registry)
+        warm = time.perf_counter() - started
+    finally:
+        server.close()
+    return {'benchmark': 'fetch_and_process_feeds', 'feeds': feeds, 'items_per_feed': items,
+            'inserted': stats['inserted'], 'translations_avoided': stats['translations_avoided'],
+            'seconds': round(cold, 3),
+            'articles_per_second': round(stats['inserted'] / cold, 1),
+            'rerun_seconds': round(warm, 3), 'rerun_entries_per_second': round(feeds * items / warm, 1)}
+
+
+def run_save_news(ingest, count):
+    from news_store import save_news_batch
+
+    records = synthetic_records(count, seed=count + 1)
+    started = time.perf_counter()
+    for record in records[:count // 2]:
+        ingest.save_news(record)
+    single = time.perf_counter() - started
+    started = time.perf_counter()
+    save_news_batch(records[count // 2:])
+    batch = time.perf_counter() - started
+    half = count // 2
+    return {'benchmark': 'save_news', 'rows': half, 'save_news_rows_per_second': round(half / single, 1),
+            'save_news_batch_rows_per_second': round((count - half) / batch, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--feeds', type=int, default=20)
+    parser.add_argument('--items', type=int, default=100, help='items per feed')
+    parser.add_argument('--server-latency', type=float, default=0.0, help='seconds per feed response')
+    parser.add_argument('--translate-latency', type=float, default=0.05, help='seconds per translation request')
+    parser.add_argument('--sentiment-latency', type=float, default=0.01, help='seconds per sentiment batch')
+    parser.add_argument('--save-rows', type=int, default=20_000)
+    args = parser.parse_args()
+
+    directory = isolated_environment()
+    ingest = setup_ingest(args.translate_latency, args.sentiment_latency)
+    results = [run_end_to_end(ingest, args.feeds, args.items, args.server_latency),
+               run_save_news(ingest, args.save_rows)]
+    for result in results:
+        print(json.dumps({**result, 'data_dir': directory}))
+
+
+if __name__ == '__main__':
+    main()
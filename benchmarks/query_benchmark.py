@@ -0,0 +1,99 @@
+"""/api/news and /visualization latency at growing table sizes, fully offline.
+
+The news table is filled with synthetic news_data.json-style rows up to each size and
+every query is timed cold (data version bumped, so the response cache misses) and
+warm (served from the cache).
+
+    python -m benchmarks.query_benchmark --sizes 10000 100000 1000000 --repeat 20
+"""
+import argparse
+import json
+import statistics
+import time
+
+from benchmarks.fixtures import isolated_environment, synthetic_records
+
+QUERIES = {
+    'latest': '/api/news?limit=100',
+    'country': '/api/news?limit=100&country=Hungary',
+    'window': '/api/news?limit=100&since=2024-01-01&sentiment=5%20stars',
+    'collapse': '/api/news?limit=100&collapse=1',
+}
+FILL_CHUNK = 50_000
+
+
+def fill(news_store, current, target):
+    for start in range(current, target, FILL_CHUNK):
+        count = min(FILL_CHUNK, target - start)
+        news_store.save_news_batch(synthetic_records(count, seed=start))
+    return target
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {'p50_ms': round(statistics.median(samples) * 1000, 2),
+            'p95_ms': round(samples[int(len(samples) * 0.95) - 1 if len(samples) > 1 else 0] * 1000, 2)}
+
+
+def timed(client, url, repeat, cold, response_cache):
+    samples = []
+    statuses = set()
+    for _ in range(repeat):
+        if cold:
+            response_cache.bump_version()
+        started = time.perf_counter()
+        response = client.get(url)
+        samples.append(time.perf_counter() - started)
+        statuses.add(response.status_code)
+    return {**percentiles(samples), 'status': sorted(statuses)}
+
+
+def deep_page(client, pages):
+    # Walks the keyset cursor; cost per page should not grow with depth
+    url = QUERIES['latest']
+    started = time.perf_counter()
+    for _ in range(pages):
+        body = client.get(url).get_json()
+        if not body.get('next_cursor'):
+            break
+        url = f"{QUERIES['latest']}&cursor={body['next_cursor']}"
+    return round((time.perf_counter() - started) / pages * 1000, 2)
+
+
+def run(app_module, size, repeat):
+    client = app_module.app.test_client()
+    cache = app_module.response_cache
+    result = {'rows': size}
+    for name, url in QUERIES.items():
+        result[f'api_news_{name}'] = {'cold': timed(client, url, repeat, True, cache),
+                                      'warm': timed(client, url, repeat, False, cache)}
+    result['api_news_page_50_ms'] = deep_page(client, 50)
+    result['visualization'] = {'cold': timed(client, '/visualization', repeat, True, cache),
+                               'warm': timed(client, '/visualization', repeat, False, cache)}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    isolated_environment()
+    import app as app_module
+    import news_store
+
+    app_module.limiter.enabled = False  # the benchmark is far above the per-client rate limits
+    rows = 0
+    for size in sorted(args.sizes):
+        started = time.perf_counter()
+        added = size - rows
+        rows = fill(news_store, rows, size)
+        fill_seconds = time.perf_counter() - started
+        result = run(app_module, size, args.repeat)
+        result['fill_rows_per_second'] = round(added / fill_seconds, 1) if added else None
+        print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Accuracy vs. throughput of the sentiment backends on a fixed labelled title set.
+
+benchmarks/sentiment_titles.json holds Hungarian titles from news_data.json, hand
+labelled negative/neutral/positive; the model's star ratings map to 1-2 negative,
+3 neutral, 4-5 positive. Each backend reports its accuracy on that set, how often it
+gives exactly the star rating of the full-precision pipeline, load time and titles/s.
+Needs torch and transformers (and the model download), like sentiment_benchmark.
+
+    python -m benchmarks.sentiment_accuracy_benchmark --backends pytorch int8 --repeat 5
+    python -m benchmarks.sentiment_accuracy_benchmark --backends int8 --server 127.0.0.1:6100
+"""
+import argparse
+import json
+import os
+import time
+
+TITLES_PATH = os.path.join(os.path.dirname(__file__), 'sentiment_titles.json')
+
+
+def load_labelled(path=TITLES_PATH):
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [record['title'] for record in records], [record['polarity'] for record in records]
+
+
+def polarity(label):
+    stars = int(label.split()[0])
+    return 'negative' if stars <= 2 else 'neutral' if stars == 3 else 'positive'
+
+
+def run(name, analyzer, titles, gold, repeat, batch_size, reference=None, load_seconds=None):
+    analyzer(titles[:batch_size], batch_size=batch_size, truncation=True)  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        labels = [output['label'] for start in range(0, len(titles), batch_size)
+                  for output in analyzer(titles[start:start + batch_size], batch_size=batch_size, truncation=True)]
+    seconds = time.perf_counter() - started
+    result = {'backend': name, 'titles': len(titles), 'batch_size': batch_size,
+              'accuracy': round(sum(polarity(label) == expected for label, expected in zip(labels, gold)) / len(gold), 3),
+              'titles_per_second': round(len(titles) * repeat / seconds, 1)}
+    if reference is not None:
+        result['same_stars_as_pytorch'] = round(sum(a == b for a, b in zip(labels, reference)) / len(labels), 3)
+    if load_seconds is not None:
+        result['load_seconds'] = round(load_seconds, 2)
+    return result, labels
+
+
+def main():
+    from sentiment import BACKENDS, RemoteAnalyzer, load_analyzer
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', nargs='*', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--server', help='host:port of a running model_worker.py, measured as "remote"')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, help='torch CPU threads for the in-process backends')
+    args = parser.parse_args()
+    if args.server and not os.getenv('SENTIMENT_SERVER_KEY'):
+        parser.error("--server needs SENTIMENT_SERVER_KEY")
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    titles, gold = load_labelled()
+    reference = None
+    # The full-precision pipeline goes first so the others can be compared with it
+    for backend in sorted(args.backends, key=lambda name: name != 'pytorch'):
+        started = time.perf_counter()
+        analyzer = load_analyzer(backend=backend)
+        result, labels = run(backend, analyzer, titles, gold, args.repeat, args.batch_size, reference,
+                             time.perf_counter() - started)
+        if backend == 'pytorch':
+            reference = labels
+        print(json.dumps(result))
+        del analyzer
+    if args.server:
+        analyzer = RemoteAnalyzer(args.server, os.getenv('SENTIMENT_SERVER_KEY'))
+        result, _ = run('remote', analyzer, titles, gold, args.repeat, args.batch_size, reference)
+        print(json.dumps({**result, 'server': args.server}))
+
+
+if __name__ == '__main__':
+    main()
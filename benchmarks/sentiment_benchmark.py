@@ -0,0 +1,51 @@
+"""Sentiment throughput at different batch sizes.
+
+    python -m benchmarks.sentiment_benchmark --limit 512 --batch-sizes 1 8 32 64 [--backend int8]
+"""
+import argparse
+import json
+import time
+
+from sentiment import BACKENDS, SentimentScorer, load_analyzer
+
+
+def load_titles(path='news_data.json', limit=512):
+    titles = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                titles.append(json.loads(line)['title'])
+            if len(titles) >= limit:
+                break
+    return titles
+
+
+def run(analyzer, titles, batch_sizes):
+    # Warm-up so model loading and first-call allocation are not measured
+    analyzer(titles[:2], truncation=True)
+    results = []
+    for batch_size in batch_sizes:
+        scorer = SentimentScorer(analyzer, batch_size=batch_size)
+        started = time.perf_counter()
+        scorer.score(titles)
+        elapsed = time.perf_counter() - started
+        results.append({'batch_size': batch_size, 'titles': len(titles), 'seconds': round(elapsed, 3),
+                        'titles_per_second': round(len(titles) / elapsed, 1)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default='news_data.json')
+    parser.add_argument('--limit', type=int, default=512)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32, 64])
+    parser.add_argument('--backend', choices=BACKENDS, default='pytorch')
+    args = parser.parse_args()
+
+    analyzer = load_analyzer(backend=args.backend)
+    for row in run(analyzer, load_titles(args.data, args.limit), args.batch_sizes):
+        print(json.dumps(row))
+
+
+if __name__ == '__main__':
+    main()
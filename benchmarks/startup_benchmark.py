@@ -0,0 +1,52 @@
+"""Cold-start cost of the web tier: import time and resident memory.
+
+    python -m benchmarks.startup_benchmark --runs 5 --module app --module ingest
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in a fresh interpreter so nothing is already imported or cached
+PROBE = '''
+import json, resource, sys, time
+started = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - started
+heavy = sorted(m for m in ('torch', 'transformers', 'plotly', 'openai', 'redis', 'sklearn', 'feedparser')
+               if m in sys.modules)
+print(json.dumps({'import_seconds': elapsed,
+                  'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  'heavy_modules': heavy}))
+'''
+
+
+def measure(module, runs):
+    env = dict(os.environ, INGEST_IN_WEB='0')
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', PROBE, module], env=env, check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'module': module,
+        'runs': runs,
+        'import_seconds_median': round(statistics.median(s['import_seconds'] for s in samples), 3),
+        'max_rss_mb_median': round(statistics.median(s['max_rss_mb'] for s in samples), 1),
+        'heavy_modules': samples[-1]['heavy_modules'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--module', action='append', dest='modules')
+    args = parser.parse_args()
+    for module in args.modules or ['app']:
+        print(json.dumps(measure(module, args.runs)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import threading
+
+import news_store
+
+
+class SeenLinks:
+    """In-memory set of article links already stored in the news table.
+
+    Warming is incremental: each refresh only reads rows whose id is above the
+    highest id seen so far, so rows written by other processes are picked up cheaply.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.links = set()
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            rows = news_store.get_connection(self.db_path).execute(
+                'SELECT id, link FROM news WHERE id > ? ORDER BY id', (self.last_id,)).fetchall()
+            for row_id, link in rows:
+                self.links.add(link)
+            if rows:
+                self.last_id = rows[-1][0]
+        return len(rows)
+
+    def __contains__(self, link):
+        return link in self.links
+
+    def add(self, links):
+        with self._lock:
+            self.links.update(links)
+
+    def filter_new(self, entries, pending=None, key=lambda entry: entry.link):
+        """Split entries into (new, skipped_count), dropping stored and repeated links.
+
+        pending is a set of links accepted earlier in the same run; new links are added to it.
+        """
+        pending = set() if pending is None else pending
+        new, skipped = [], 0
+        for entry in entries:
+            link = key(entry)
+            if link in self.links or link in pending:
+                skipped += 1
+            else:
+                pending.add(link)
+                new.append(entry)
+        return new, skipped
@@ -0,0 +1,120 @@
+"""Streaming export of the news table as NDJSON or CSV.
+
+    python export.py --format ndjson --gzip -o news.ndjson.gz
+    python export.py --format csv --country Hungary --after 12345 > news.csv
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import zlib
+
+import news_store
+
+EXPORT_FIELDS = ('id', 'country', 'title', 'link', 'published')
+CHUNK_SIZE = 1000
+
+
+def iter_rows(fields=EXPORT_FIELDS, country=None, after=0, chunk_size=CHUNK_SIZE, db_path=None):
+    """Yield rows as dicts in id order, reading chunk_size rows per query.
+
+    Each chunk is its own short read, so the exporter neither holds memory for the whole
+    table nor a read transaction open for the whole export.
+    """
+    selected = list(dict.fromkeys(['id', *fields]))
+    query = f'SELECT {", ".join(selected)} FROM news WHERE id > ?'
+    if country:
+        query += ' AND country = ?'
+    query += ' ORDER BY id LIMIT ?'
+    conn = news_store.get_connection(db_path)
+    while True:
+        params = [after, country, chunk_size] if country else [after, chunk_size]
+        rows = conn.execute(query, params).fetchall()
+        if not rows:
+            return
+        for row in rows:
+            yield {field: row[selected.index(field)] for field in fields}
+        after = rows[-1][0]
+
+
+def iter_ndjson(rows):
+    # Same line format as news_data.json
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def iter_csv(rows, fields=EXPORT_FIELDS):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_gzip(chunks, flush_every=64 * 1024):
+    """Gzip a stream of text chunks incrementally."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    pending = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        pending += len(data)
+        out = compressor.compress(data)
+        if pending >= flush_every:
+            out += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def encode_rows(rows, fmt='ndjson', fields=EXPORT_FIELDS, gzip=False):
+    """Turn a row iterator into export chunks: str, or bytes when gzip is set."""
+    if fmt == 'ndjson':
+        chunks = iter_ndjson(rows)
+    elif fmt == 'csv':
+        chunks = iter_csv(rows, fields)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return iter_gzip(chunks) if gzip else chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the news archive as NDJSON or CSV.')
+    parser.add_argument('--format', choices=('ndjson', 'csv'), default='ndjson')
+    parser.add_argument('--country')
+    parser.add_argument('--after', type=int, default=0, help='resume after this article id')
+    parser.add_argument('--gzip', action='store_true')
+    parser.add_argument('--db', default=None)
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    args = parser.parse_args()
+
+    # Track the last exported id so an interrupted export can be resumed with --after
+    last_id = args.after
+    rows = iter_rows(country=args.country, after=args.after, db_path=args.db)
+
+    def tracked(rows):
+        nonlocal last_id
+        for row in rows:
+            yield row
+            last_id = row['id']
+
+    chunks = encode_rows(tracked(rows), args.format, gzip=args.gzip)
+    out = open(args.output, 'wb' if args.gzip else 'w', encoding=None if args.gzip else 'utf-8') \
+        if args.output else (sys.stdout.buffer if args.gzip else sys.stdout)
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+        print(f"Last exported id: {last_id} (resume with --after {last_id})", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Validate candidate feed URLs (e.g. search results) and score the working feeds.
+
+Candidates are fetched concurrently with the feed_fetcher engine. A candidate that
+parses as a feed with entries is kept; an HTML page is searched for
+<link rel="alternate" type="application/rss+xml"> autodiscovery links, which are
+then fetched in a second concurrent round. Every feed found is scored by how many
+items it carries and how recent its newest item is.
+"""
+import json
+import logging
+import time
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from feed_fetcher import PER_HOST_LIMIT, fetch_feeds
+from poll_schedule import entry_timestamps
+
+DISCOVERY_TIMEOUT = 5  # seconds; a slow candidate is not worth waiting for
+MAX_WORKERS = 32
+FULL_FEED_ITEMS = 30  # a feed with this many items gets the full volume score
+FRESHNESS_HALF_LIFE = 2 * 86400
+MIN_SCORE = 0.3
+MAX_FEEDS_PER_COUNTRY = 5
+RESULTS_PATH = 'rss_search_results.json'
+FEED_TYPES = ('application/rss+xml', 'application/atom+xml', 'application/rdf+xml', 'application/xml', 'text/xml')
+
+
+class _AlternateLinks(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'link':
+            return
+        attrs = {name: (value or '') for name, value in attrs}
+        rel = attrs.get('rel', '').lower().split()
+        if 'alternate' in rel and attrs.get('type', '').lower() in FEED_TYPES and attrs.get('href'):
+            self.links.append(attrs['href'])
+
+
+def alternate_links(html, base_url):
+    """Feed URLs advertised by an HTML page through <link rel="alternate">."""
+    parser = _AlternateLinks()
+    try:
+        parser.feed(html[:262144].decode('utf-8', errors='replace'))
+    except Exception:
+        pass  # a broken page may still have yielded links before the error
+    return [urljoin(base_url, href) for href in dict.fromkeys(parser.links)]
+
+
+def score_feed(feed, now=None):
+    """0..1: half for item count, half for freshness of the newest item."""
+    now = now or time.time()
+    volume = min(len(feed.entries), FULL_FEED_ITEMS) / FULL_FEED_ITEMS
+    timestamps = entry_timestamps(feed)
+    freshness = 0.5 ** (max(now - max(timestamps), 0) / FRESHNESS_HALF_LIFE) if timestamps else 0.0
+    return round(0.5 * volume + 0.5 * freshness, 3)
+
+
+def _describe(result, source, now):
+    feed = result['feed']
+    timestamps = entry_timestamps(feed)
+    return {
+        'url': result['url'],
+        'title': feed.feed.get('title', ''),
+        'items': len(feed.entries),
+        'newest': max(timestamps) if timestamps else None,
+        'score': score_feed(feed, now),
+        'source': source,
+    }
+
+
+def discover(candidates, timeout=DISCOVERY_TIMEOUT, max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT,
+             now=None):
+    """Validate candidate URLs; returns {feed url: description} for every working feed."""
+    now = now or time.time()
+    feeds = {}
+    alternates = {}
+    for result in fetch_feeds(candidates, timeout=timeout, max_workers=max_workers, per_host_limit=per_host_limit,
+                              keep_body=True):
+        if result['error'] or result['feed'] is None:
+            continue
+        if result['feed'].entries:
+            feeds[result['url']] = _describe(result, result['url'], now)
+        elif b'<' in result['body'][:1024]:
+            for link in alternate_links(result['body'], result['url']):
+                alternates.setdefault(link, result['url'])
+
+    # Autodiscovered feeds are validated the same way, in one more concurrent round
+    pending = [url for url in alternates if url not in feeds]
+    for result in fetch_feeds(pending, timeout=timeout, max_workers=max_workers, per_host_limit=per_host_limit):
+        if not result['error'] and result['feed'] is not None and result['feed'].entries:
+            feeds[result['url']] = _describe(result, alternates[result['url']], now)
+    logging.info(f"Feed discovery: {len(feeds)} feeds from {len(candidates)} candidates "
+                 f"({len(alternates)} autodiscovery links)")
+    return feeds
+
+
+def discover_by_country(candidates_by_country, **kwargs):
+    """Validate {country: [candidate urls]} in one concurrent pass; returns {country: [feeds]} best first."""
+    all_candidates = list(dict.fromkeys(url for urls in candidates_by_country.values() for url in urls))
+    feeds = discover(all_candidates, **kwargs)
+    by_source = {}
+    for feed in feeds.values():
+        by_source.setdefault(feed['source'], []).append(feed)
+    return {country: sorted((feed for url in dict.fromkeys(urls) for feed in by_source.get(url, [])),
+                            key=lambda feed: feed['score'], reverse=True)
+            for country, urls in candidates_by_country.items()}
+
+
+def merge_feeds(registry, discovered, min_score=MIN_SCORE, max_per_country=MAX_FEEDS_PER_COUNTRY):
+    """Add the best validated feeds to a {country: [urls]} registry in place; returns the added (country, url)."""
+    known = {url.rstrip('/') for urls in registry.values() for url in urls}
+    added = []
+    for country, feeds in discovered.items():
+        urls = registry.setdefault(country, [])
+        for feed in feeds:
+            if len(urls) >= max_per_country:
+                break
+            if feed['score'] >= min_score and feed['url'].rstrip('/') not in known:
+                urls.append(feed['url'])
+                known.add(feed['url'].rstrip('/'))
+                added.append((country, feed['url']))
+    return added
+
+
+def save_discovered(discovered, path=RESULTS_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(discovered, f, indent=4, ensure_ascii=False)
+
+
+def load_discovered(path=RESULTS_PATH):
+    """{country: [feeds]} saved by a discovery run; raw URL lists from older runs are ignored."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            results = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {country: [feed for feed in feeds if isinstance(feed, dict) and 'score' in feed]
+            for country, feeds in results.items()}
@@ -0,0 +1,138 @@
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import feedparser
+import requests
+
+import news_store
+
+# Fetch engine defaults
+DEFAULT_TIMEOUT = 10  # seconds, applied to both connect and read
+MAX_WORKERS = 16
+PER_HOST_LIMIT = 2
+USER_AGENT = 'InsightHub/1.0 (+https://github.com/AleksaVK/InsightHub)'
+
+_local = threading.local()
+
+
+def _session():
+    # requests.Session is not thread-safe, so every worker thread keeps its own
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+        _local.session.headers['User-Agent'] = USER_AGENT
+    return _local.session
+
+
+# Conditional-GET validators (ETag / Last-Modified) stored per feed; the table is created
+# by the ingest and worker init blocks, not on every lookup
+def init_validators(db_path=None):
+    conn = news_store.get_connection(db_path)
+    with conn:
+        conn.execute('''CREATE TABLE IF NOT EXISTS feed_validators
+                        (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, checked_at REAL)''')
+
+
+def load_validators(db_path=None):
+    rows = news_store.get_connection(db_path).execute('SELECT url, etag, last_modified FROM feed_validators')
+    return {url: {'etag': etag, 'last_modified': last_modified} for url, etag, last_modified in rows}
+
+
+def load_validator(url, db_path=None):
+    row = news_store.get_connection(db_path).execute('SELECT etag, last_modified FROM feed_validators WHERE url = ?',
+                                                     (url,)).fetchone()
+    return {'etag': row[0], 'last_modified': row[1]} if row else None
+
+
+def save_validator(result, db_path=None):
+    """Remember the validators of a successfully processed 200 response."""
+    if result['status'] != 200 or not (result['etag'] or result['last_modified']):
+        return
+    conn = news_store.get_connection(db_path)
+    with conn:
+        conn.execute('INSERT OR REPLACE INTO feed_validators (url, etag, last_modified, checked_at) VALUES (?, ?, ?, ?)',
+                     (result['url'], result['etag'], result['last_modified'], time.time()))
+
+
+def _max_age(headers):
+    match = re.search(r'max-age=(\d+)', headers.get('Cache-Control', ''))
+    return int(match.group(1)) if match else None
+
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
+
+
+def fetch_feed(url, validator=None, timeout=DEFAULT_TIMEOUT, keep_body=False):
+    """Fetch and parse one feed, sending a conditional GET when validators are known.
+
+    Returns a result dict; 'elapsed' covers download and parsing, 'parse_elapsed' the
+    parsing alone. 'status' is 304 with feed=None when the feed is unchanged
+    and None with 'error' set when the request failed. keep_body=True also returns the
+    raw response ('body', 'content_type'), e.g. to look for feed links in an HTML page.
+    """
+    headers = {}
+    if validator:
+        if validator.get('etag'):
+            headers['If-None-Match'] = validator['etag']
+        if validator.get('last_modified'):
+            headers['If-Modified-Since'] = validator['last_modified']
+
+    result = {'url': url, 'status': None, 'feed': None, 'etag': None, 'last_modified': None,
+              'max_age': None, 'error': None, 'elapsed': 0.0, 'parse_elapsed': 0.0}
+    started = time.perf_counter()
+    try:
+        response = _session().get(url, headers=headers, timeout=timeout)
+        result['status'] = response.status_code
+        result['max_age'] = _max_age(response.headers)
+        if response.status_code == 200:
+            result['etag'] = response.headers.get('ETag')
+            result['last_modified'] = response.headers.get('Last-Modified')
+            parse_started = time.perf_counter()
+            result['feed'] = feedparser.parse(response.content,
+                                              response_headers={k.lower(): v for k, v in response.headers.items()})
+            result['parse_elapsed'] = time.perf_counter() - parse_started
+            if keep_body:
+                result['body'] = response.content
+                result['content_type'] = response.headers.get('Content-Type', '')
+        elif response.status_code != 304:
+            result['error'] = f"HTTP {response.status_code}"
+    except requests.RequestException as e:
+        result['error'] = str(e)
+    result['elapsed'] = time.perf_counter() - started
+    return result
+
+
+def fetch_feeds(urls, validators=None, timeout=DEFAULT_TIMEOUT, max_workers=MAX_WORKERS,
+                per_host_limit=PER_HOST_LIMIT, keep_body=False):
+    """Fetch many feeds concurrently and yield the result dicts as they complete.
+
+    Every host has its own queue and a URL is handed to the pool only while its host
+    has fewer than per_host_limit requests in flight, so pool threads never wait on a
+    busy host and a slow host delays only its own feeds.
+    """
+    validators = validators or {}
+    queues = {}
+    for url in dict.fromkeys(urls):
+        queues.setdefault(_host(url), deque()).append(url)
+    if not queues:
+        return
+    in_flight = {}  # future -> host
+    with ThreadPoolExecutor(max_workers=min(max_workers, sum(map(len, queues.values())))) as executor:
+        def submit(host):
+            url = queues[host].popleft()
+            in_flight[executor.submit(fetch_feed, url, validators.get(url), timeout, keep_body)] = host
+
+        for host, queue in queues.items():
+            for _ in range(min(per_host_limit, len(queue))):
+                submit(host)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                host = in_flight.pop(future)
+                if queues[host]:
+                    submit(host)
+                yield future.result()
@@ -0,0 +1,234 @@
+"""Feed registry: the feeds and country search queries, stored in news.db.
+
+Feeds can be added, disabled or removed at runtime (see the /api/admin/feeds routes)
+without a code change or restart. Every fetch records the feed's health: last status,
+latency, error streak and items per fetch. A feed that fails BACKOFF_AFTER times in a
+row is backed off, exponentially longer with every further failure, so it stops
+taking fetch slots; one successful fetch clears the backoff.
+
+Ingest reads the registry through FeedSnapshot, an in-memory copy that reloads only
+when feeds_version changes. Triggers bump that version on every change that affects
+which feeds are fetched, not on health updates.
+"""
+import logging
+import time
+
+import news_store
+
+SEED_COUNTRIES = {
+    "Hungary": "Magyarország híroldal RSS feed",
+    "Serbia": "Szerbia híroldal RSS feed",
+    "Slovakia": "Szlovákia híroldal RSS feed",
+    "Slovenia": "Szlovénia híroldal RSS feed",
+    "Austria": "Ausztria híroldal RSS feed",
+    "Poland": "Lengyelország híroldal RSS feed",
+    "Czech Republic": "Csehország híroldal RSS feed",
+    "Romania": "Románia híroldal RSS feed"
+}
+
+SEED_FEEDS = {
+    "Hungary": ["https://index.hu/24ora/rss", "https://hvg.hu/rss/rss.html"],
+    "Serbia": ["https://www.rts.rs/page/stories/sr/rss.html", "https://www.b92.net/info/rss/"],
+    "Slovakia": ["https://www.aktuality.sk/rss/"],
+    "Slovenia": ["https://www.rtvslo.si/rss"],
+    "Austria": ["https://www.diepresse.com/rss"],
+    "Poland": ["https://www.tvn24.pl/najnowsze.xml"],
+    "Czech Republic": ["https://www.ceskatelevize.cz/rss/"],
+    "Romania": ["https://www.digi24.ro/rss"]
+}
+
+BACKOFF_AFTER = 3  # consecutive failures before a feed is backed off
+BACKOFF_BASE = 3600  # seconds, doubled for every further failure
+BACKOFF_MAX = 7 * 86400
+ITEMS_SMOOTHING = 0.3
+ADMIN_FIELDS = ('url', 'country', 'enabled')
+
+
+def init_registry(db_path=None):
+    """Create the registry tables; an empty registry is seeded with the built-in feeds."""
+    conn = news_store.get_connection(db_path)
+    with conn:
+        # Registries created before import_discovered() existed already hold the discovered feeds
+        legacy = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'registry_imports'").fetchone() is None
+        conn.execute('''CREATE TABLE IF NOT EXISTS feeds
+                        (id INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE, country TEXT NOT NULL,
+                         enabled INTEGER NOT NULL DEFAULT 1, source TEXT NOT NULL DEFAULT 'admin',
+                         last_status INTEGER, last_latency REAL, last_error TEXT, last_fetched_at REAL,
+                         error_streak INTEGER NOT NULL DEFAULT 0, items_per_fetch REAL, backoff_until REAL,
+                         created_at REAL NOT NULL)''')
+        conn.execute('CREATE TABLE IF NOT EXISTS countries (name TEXT PRIMARY KEY, search_query TEXT NOT NULL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS registry_imports (source TEXT PRIMARY KEY, imported_at REAL NOT NULL)')
+        conn.execute('''CREATE TABLE IF NOT EXISTS feeds_version
+                        (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)''')
+        conn.execute('INSERT OR IGNORE INTO feeds_version VALUES (1, 0)')
+        bump = 'BEGIN UPDATE feeds_version SET version = version + 1; END'
+        conn.execute(f'CREATE TRIGGER IF NOT EXISTS feeds_version_insert AFTER INSERT ON feeds {bump}')
+        conn.execute(f'CREATE TRIGGER IF NOT EXISTS feeds_version_delete AFTER DELETE ON feeds {bump}')
+        conn.execute(f'''CREATE TRIGGER IF NOT EXISTS feeds_version_update
+                         AFTER UPDATE OF url, country, enabled, backoff_until ON feeds
+                         WHEN OLD.url IS NOT NEW.url OR OLD.country IS NOT NEW.country
+                           OR OLD.enabled IS NOT NEW.enabled OR OLD.backoff_until IS NOT NEW.backoff_until
+                         {bump}''')
+
+        if conn.execute('SELECT COUNT(*) FROM countries').fetchone()[0] == 0:
+            conn.executemany('INSERT INTO countries VALUES (?, ?)', SEED_COUNTRIES.items())
+        now = time.time()
+        if conn.execute('SELECT COUNT(*) FROM feeds').fetchone()[0] == 0:
+            conn.executemany("INSERT OR IGNORE INTO feeds (url, country, source, created_at) VALUES (?, ?, 'seed', ?)",
+                             [(url, country, now) for country, urls in SEED_FEEDS.items() for url in urls])
+        elif legacy:
+            conn.execute("INSERT OR IGNORE INTO registry_imports VALUES ('discovery', ?)", (now,))
+
+
+def import_discovered(db_path=None):
+    """Carry the feeds validated by an earlier discovery run over into the registry, once per database.
+
+    Kept out of init_registry so the web tier, which only reads the registry, never
+    imports feed_discovery and with it the fetch engine. Returns the added (country, url).
+    """
+    import feed_discovery
+
+    conn = news_store.get_connection(db_path)
+    with conn:
+        if conn.execute("SELECT 1 FROM registry_imports WHERE source = 'discovery'").fetchone():
+            return []
+        registry = {}
+        for url, country in conn.execute('SELECT url, country FROM feeds ORDER BY id'):
+            registry.setdefault(country, []).append(url)
+        now = time.time()
+        added = feed_discovery.merge_feeds(registry, feed_discovery.load_discovered())
+        conn.executemany("INSERT OR IGNORE INTO feeds (url, country, source, created_at) VALUES (?, ?, 'discovered', ?)",
+                         [(url, country, now) for country, url in added])
+        conn.execute("INSERT INTO registry_imports VALUES ('discovery', ?)", (now,))
+    return added
+
+
+def version(db_path=None):
+    return news_store.get_connection(db_path).execute('SELECT version FROM feeds_version').fetchone()[0]
+
+
+# Admin operations
+def list_feeds(db_path=None):
+    conn = news_store.get_connection(db_path)
+    cursor = conn.execute('SELECT * FROM feeds ORDER BY country, id')
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+
+def add_feed(url, country, source='admin', db_path=None):
+    """Register a feed; returns its id, or None when the url is already registered."""
+    conn = news_store.get_connection(db_path)
+    with conn:
+        cursor = conn.execute('INSERT OR IGNORE INTO feeds (url, country, source, created_at) VALUES (?, ?, ?, ?)',
+                              (url, country, source, time.time()))
+    return cursor.lastrowid if cursor.rowcount else None
+
+
+def update_feed(feed_id, changes, *, db_path=None):
+    """Apply a {field: value} dict of url, country or enabled; re-enabling a feed also clears its backoff.
+
+    Returns False if the feed is unknown; raises ValueError for an invalid change and
+    sqlite3.IntegrityError when the new url is already registered.
+    """
+    if not isinstance(changes, dict):
+        raise ValueError("Changes must be an object")
+    unknown = set(changes) - set(ADMIN_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot update {', '.join(sorted(unknown))}")
+    for field in ('url', 'country'):
+        if field in changes and not (isinstance(changes[field], str) and changes[field].strip()):
+            raise ValueError(f"{field} must be a non-empty string")
+    columns = dict(changes)
+    if 'enabled' in columns:
+        if not isinstance(columns['enabled'], (bool, int)):
+            raise ValueError("enabled must be a boolean")
+        columns['enabled'] = int(bool(columns['enabled']))
+        if columns['enabled']:
+            columns.update(error_streak=0, backoff_until=None)
+    if not columns:
+        return True
+    conn = news_store.get_connection(db_path)
+    with conn:
+        cursor = conn.execute(f"UPDATE feeds SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                              (*columns.values(), feed_id))
+    return cursor.rowcount > 0
+
+
+def remove_feed(feed_id, db_path=None):
+    conn = news_store.get_connection(db_path)
+    with conn:
+        return conn.execute('DELETE FROM feeds WHERE id = ?', (feed_id,)).rowcount > 0
+
+
+def load_countries(db_path=None):
+    """{country: search query} used by feed discovery."""
+    return dict(news_store.get_connection(db_path).execute('SELECT name, search_query FROM countries ORDER BY name'))
+
+
+# Health
+def backoff_delay(error_streak):
+    if error_streak < BACKOFF_AFTER:
+        return None
+    return min(BACKOFF_BASE * 2 ** (error_streak - BACKOFF_AFTER), BACKOFF_MAX)
+
+
+def record_fetch(result, db_path=None):
+    """Update a feed's health from a feed_fetcher result dict."""
+    now = time.time()
+    conn = news_store.get_connection(db_path)
+    row = conn.execute('SELECT error_streak, items_per_fetch FROM feeds WHERE url = ?', (result['url'],)).fetchone()
+    if row is None:
+        return  # not a registered feed
+    streak, items_per_fetch = row
+    if result['error']:
+        streak += 1
+        delay = backoff_delay(streak)
+        backoff_until = now + delay if delay else None
+        if delay:
+            logging.warning(f"Feed {result['url']} failed {streak} times in a row, backing off for {delay}s")
+    else:
+        streak, backoff_until = 0, None
+        if result['feed'] is not None:  # a 304 carries no items
+            items = len(result['feed'].entries)
+            items_per_fetch = items if items_per_fetch is None else (
+                ITEMS_SMOOTHING * items + (1 - ITEMS_SMOOTHING) * items_per_fetch)
+    with conn:
+        conn.execute('''UPDATE feeds SET last_status = ?, last_latency = ?, last_error = ?, last_fetched_at = ?,
+                        error_streak = ?, items_per_fetch = ?, backoff_until = ? WHERE url = ?''',
+                     (result['status'], result['elapsed'], result['error'], now, streak, items_per_fetch,
+                      backoff_until, result['url']))
+
+
+class FeedSnapshot:
+    """In-memory copy of the enabled feeds, reloaded only when the registry version changes."""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.version = None
+        self.rows = []
+
+    def refresh(self):
+        current = version(self.db_path)
+        if current != self.version:
+            self.rows = news_store.get_connection(self.db_path).execute(
+                'SELECT url, country, backoff_until FROM feeds WHERE enabled = 1 ORDER BY country, id').fetchall()
+            self.version = current
+        return self
+
+    def feeds(self, now=None):
+        """{country: [feed urls]} of the enabled feeds that are not backed off."""
+        self.refresh()
+        now = now or time.time()
+        feeds = {}
+        for url, country, backoff_until in self.rows:
+            if backoff_until is None or backoff_until <= now:
+                feeds.setdefault(country, []).append(url)
+        return feeds
+
+
+snapshot = FeedSnapshot()
+
+
+def load_feeds(db_path=None):
+    """{country: [feed urls]} to fetch right now."""
+    return (snapshot if db_path is None else FeedSnapshot(db_path)).feeds()
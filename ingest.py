@@ -0,0 +1,331 @@
+"""Ingest tier: fetch feeds, translate, score sentiment and store articles.
+
+Everything heavy (feedparser/requests, OpenAI, torch/transformers) is loaded here
+on first use, never by the web tier. Production ingest runs through the job queue
+(python worker.py); `python ingest.py` runs a single in-process pass over all feeds.
+"""
+import logging
+import os
+import sqlite3
+
+from dotenv import load_dotenv
+
+import aggregates
+import feed_registry
+import language
+import metrics
+import near_duplicates
+import news_store
+import poll_schedule
+import search_index
+from api_cache import response_cache
+from dedup import SeenLinks
+from translation import BatchTranslator, OpenAIBackend
+from sentiment import SENTIMENT_MODEL, RemoteAnalyzer, SentimentScorer, load_analyzer
+
+# Load environment variables from .env file
+load_dotenv()
+
+TARGET_LANGUAGE = 'hu'
+# 'pytorch' (full precision) or 'int8' (dynamically quantized, CPU); see benchmarks/sentiment_benchmark.py
+SENTIMENT_BACKEND = os.getenv('SENTIMENT_BACKEND', 'pytorch')
+# host:port of a running `python model_worker.py`; unset loads the model in this process
+SENTIMENT_SERVER = os.getenv('SENTIMENT_SERVER')
+SENTIMENT_SERVER_KEY = os.getenv('SENTIMENT_SERVER_KEY')
+
+_translator = None
+_sentiment_scorer = None
+
+# Translation with batched backend requests and a persistent cache
+def get_translator():
+    global _translator
+    if _translator is None:
+        _translator = BatchTranslator(OpenAIBackend())
+    return _translator
+
+def translate_texts(texts, target_language=TARGET_LANGUAGE):
+    return get_translator().translate(texts, target_language)
+
+# Titles already in the target language skip translation; the rest is batched per source language
+def translate_titles(feed_url, titles, target_language=TARGET_LANGUAGE):
+    """Return (translated titles, number of translations avoided)."""
+    try:
+        languages = language.title_languages(feed_url, titles)
+    except Exception as e:
+        logging.error(f"Language detection failed for {feed_url}, error: {e}")
+        languages = [None] * len(titles)
+    groups = {}
+    for index, source_language in enumerate(languages):
+        if source_language != target_language:
+            groups.setdefault(source_language, []).append(index)
+
+    translated = list(titles)
+    for source_language, indices in groups.items():
+        texts = get_translator().translate([titles[index] for index in indices], target_language, source_language)
+        for index, text in zip(indices, texts):
+            translated[index] = text
+    return translated, len(titles) - sum(len(indices) for indices in groups.values())
+
+# BERT sentiment analyzer setup: the shared model worker pool when SENTIMENT_SERVER is set, else an in-process model
+def setup_sentiment_analyzer():
+    if SENTIMENT_SERVER:
+        return RemoteAnalyzer(SENTIMENT_SERVER, SENTIMENT_SERVER_KEY)
+    return load_analyzer(SENTIMENT_MODEL, SENTIMENT_BACKEND)
+
+def get_sentiment_scorer():
+    # The model is loaded by the first run that has titles to score
+    global _sentiment_scorer
+    if _sentiment_scorer is None:
+        _sentiment_scorer = SentimentScorer(setup_sentiment_analyzer(),
+                                            batch_size=int(os.getenv('SENTIMENT_BATCH_SIZE', 32)))
+    return _sentiment_scorer
+
+# Save news to the database
+def save_news(news):
+    try:
+        news_store.save_news_batch([news])
+    except sqlite3.Error:
+        pass  # already logged by news_store
+
+# Links already in the news table, used to skip known entries before translation
+seen_links = SeenLinks()
+
+# Determine political bias
+def determine_political_bias(text):
+    return 'right' if 'jobboldal' in text.lower() else 'left'
+
+# Reuse the sentiment of an already stored near-duplicate story
+def reuse_story_sentiment(articles):
+    try:
+        matches = near_duplicates.find_matches([news['title'] for news in articles])
+    except Exception as e:
+        logging.error(f"Near-duplicate lookup failed, error: {e}")
+        return 0
+    matched_ids = {news_id for news_id in matches if news_id is not None}
+    if not matched_ids:
+        return 0
+    conn = news_store.get_connection()
+    sentiments = {}
+    for news_id in matched_ids:
+        row = conn.execute('SELECT sentiment FROM news WHERE id = ?', (news_id,)).fetchone()
+        if row and row[0]:
+            sentiments[news_id] = row[0]
+    reused = 0
+    for news, news_id in zip(articles, matches):
+        if news_id in sentiments:
+            news['sentiment'] = sentiments[news_id]
+            reused += 1
+    logging.info(f"Near-duplicates: reused sentiment for {reused} of {len(articles)} articles")
+    return reused
+
+# Every poll, successful or not, feeds the adaptive schedule, the feed's health stats and the metrics
+def record_poll(result, country):
+    labels = {'feed': result['url'], 'country': country}
+    metrics.inc('ingest_fetches_total', status=str(result['status'] or 'error'), **labels)
+    metrics.observe('ingest_stage_seconds', result['elapsed'] - result['parse_elapsed'], stage='fetch', **labels)
+    if result['feed'] is not None:
+        metrics.observe('ingest_stage_seconds', result['parse_elapsed'], stage='parse', **labels)
+    try:
+        poll_schedule.record_poll(result)
+        feed_registry.record_fetch(result)
+    except sqlite3.Error as e:
+        logging.error(f"Failed to update poll schedule for {result['url']}, error: {e}")
+
+# Feeds to fetch: {country: [feed urls]} from the registry snapshot, without backed-off feeds
+def load_feeds():
+    return feed_registry.load_feeds()
+
+# Turn one fetched feed into article dicts (without sentiment)
+def prepare_feed_articles(result, country, pending):
+    feed = result['feed']
+    # Already stored links are dropped before any translation or model work
+    entries = [entry for entry in feed.entries if entry.get('link')]
+    new_entries, skipped = seen_links.filter_new(entries, pending=pending)
+
+    labels = {'feed': result['url'], 'country': country}
+    metrics.inc('ingest_entries_total', len(entries) - skipped, outcome='new', **labels)
+    metrics.inc('ingest_entries_total', skipped, outcome='skipped', **labels)
+
+    titles = [entry.title for entry in new_entries]
+    with metrics.timer('ingest_stage_seconds', stage='translate', **labels):
+        translated_titles, avoided = translate_titles(result['url'], titles)
+    # Only when a translator exists: a feed already in the target language must not need one
+    if _translator is not None:
+        metrics.track_stats('translation', _translator.stats)
+    metrics.inc('translation_avoided_total', avoided, **labels)
+
+    articles = [{
+        'country': country,
+        'title': translated_title,
+        'link': entry.link,
+        'published': entry.get('published', 'unknown'),
+        'political_bias': determine_political_bias(translated_title),
+    } for entry, translated_title in zip(new_entries, translated_titles)]
+    return articles, len(entries), skipped, avoided
+
+# Score and store the articles of one or more processed feeds in one transaction;
+# labels tag the metrics with the feed and country (or 'all' for a multi-feed run)
+def store_articles(processed, labels=None):
+    from feed_fetcher import save_validator
+
+    labels = labels or {'feed': 'all', 'country': 'all'}
+    # Near-duplicates of stored stories reuse that story's sentiment instead of the model
+    articles = [news for _, feed_articles in processed for news in feed_articles]
+    reused = reuse_story_sentiment(articles)
+
+    # Sentiment is scored in one pass so the model sees full batches
+    to_score = [news for news in articles if 'sentiment' not in news]
+    with metrics.timer('ingest_stage_seconds', stage='sentiment', **labels):
+        sentiments = get_sentiment_scorer().score([news['title'] for news in to_score]) if to_score else []
+    for news, sentiment in zip(to_score, sentiments):
+        news['sentiment'] = sentiment
+    if to_score:
+        metrics.track_stats('sentiment', get_sentiment_scorer().stats)
+    metrics.inc('sentiment_reused_total', reused)
+
+    with metrics.timer('ingest_stage_seconds', stage='db_write', **labels):
+        stats = news_store.save_news_batch(articles)
+    metrics.inc('ingest_articles_total', stats['inserted'], outcome='inserted', **labels)
+    metrics.inc('ingest_articles_total', stats['ignored'], outcome='ignored', **labels)
+    logging.info(f"Ingest: {stats['inserted']} articles inserted, {stats['ignored']} duplicates ignored")
+    seen_links.add(news['link'] for news in articles)
+
+    # The rows are already committed: a validator that cannot be saved only costs a full fetch next time
+    try:
+        for result, _ in processed:
+            save_validator(result)
+    except sqlite3.Error as e:
+        logging.error(f"Failed to save feed validators, error: {e}")
+    stats['sentiment_reused'] = reused
+    return stats
+
+# Story ids and topic clusters are derived from stored rows after each ingest
+def update_derived_data():
+    # New articles join their near-duplicate story, if one is already stored
+    try:
+        with metrics.timer('ingest_stage_seconds', stage='stories'):
+            _, linked = near_duplicates.assign_stories()
+        # Story ids change collapsed /api/news pages, so cached ones must not be served
+        if linked:
+            response_cache.bump_version()
+    except Exception as e:
+        logging.error(f"Near-duplicate assignment failed, error: {e}")
+
+    # New titles are folded into the topic model; /visualize only reads the stored clusters
+    try:
+        import topic_clustering
+        with metrics.timer('ingest_stage_seconds', stage='topics'):
+            topic_clustering.update_clusters()
+    except Exception as e:
+        logging.error(f"Topic clustering update failed, error: {e}")
+
+    # The similarity graph is laid out here over a bounded node set; /visualize only serves the image
+    try:
+        import social_graph
+        with metrics.timer('ingest_stage_seconds', stage='social_graph'):
+            social_graph.build_graph()
+    except Exception as e:
+        logging.error(f"Social graph build failed, error: {e}")
+
+    # Columnar snapshot for the analytics views; rebuilt at most every SNAPSHOT_INTERVAL
+    try:
+        import analytics_snapshot
+        with metrics.timer('ingest_stage_seconds', stage='snapshot'):
+            analytics_snapshot.refresh_snapshot()
+    except Exception as e:
+        logging.error(f"Analytics snapshot build failed, error: {e}")
+
+# Ingest a single feed; used by the queue worker, errors propagate so the job is retried
+def ingest_feed(feed_url, country):
+    from feed_fetcher import fetch_feed, load_validator
+
+    result = fetch_feed(feed_url, load_validator(feed_url))
+    record_poll(result, country)
+    if result['error']:
+        raise RuntimeError(f"Failed to fetch RSS feed: {feed_url}, error: {result['error']}")
+    if result['status'] == 304:
+        logging.info(f"RSS feed not modified: {feed_url}")
+        return {'inserted': 0, 'ignored': 0, 'entries': 0, 'skipped': 0}
+
+    seen_links.refresh()
+    articles, entries, skipped, avoided = prepare_feed_articles(result, country, set())
+    stats = store_articles([(result, articles)], labels={'feed': feed_url, 'country': country})
+    stats.update(entries=entries, skipped=skipped, translations_avoided=avoided)
+    return stats
+
+# Fetch and process RSS feeds in-process, all feeds in one run
+def fetch_and_process_feeds(feeds=None):
+    with metrics.profiled('ingest_run'), metrics.timer('ingest_run_seconds'):
+        try:
+            return _process_feeds(feeds)
+        finally:
+            metrics.flush()
+
+def _process_feeds(feeds):
+    from feed_fetcher import fetch_feeds, load_validators
+
+    if feeds is None:
+        feeds = load_feeds()
+    feed_countries = {feed_url: country for country, country_feeds in feeds.items() for feed_url in country_feeds}
+    validators = load_validators()
+    processed = []
+    seen_links.refresh()
+    run_links = set()
+    total_entries = skipped_entries = translations_avoided = 0
+
+    # Feeds are downloaded concurrently; unchanged ones answer 304 and are skipped
+    for result in fetch_feeds(feed_countries, validators=validators):
+        feed_url = result['url']
+        record_poll(result, feed_countries[feed_url])
+        if result['error']:
+            logging.error(f"Failed to fetch RSS feed: {feed_url}, error: {result['error']}")
+            continue
+        if result['status'] == 304:
+            logging.info(f"RSS feed not modified: {feed_url}")
+            continue
+
+        try:
+            articles, entries, skipped, avoided = prepare_feed_articles(result, feed_countries[feed_url], run_links)
+            total_entries += entries
+            skipped_entries += skipped
+            translations_avoided += avoided
+            processed.append((result, articles))
+        except Exception as e:
+            logging.error(f"Failed to process RSS feed: {feed_url}, error: {e}")
+
+    skip_ratio = skipped_entries / total_entries if total_entries else 0.0
+    logging.info(f"Dedup: skipped {skipped_entries} of {total_entries} entries already stored ({skip_ratio:.1%})")
+    logging.info(f"Language routing: {translations_avoided} titles already in {TARGET_LANGUAGE}, translation skipped")
+
+    # The whole run is scored in one pass and written in one transaction
+    try:
+        stats = store_articles(processed)
+    except Exception as e:
+        logging.error(f"Failed to store ingest run, error: {e}")
+        return
+    stats.update(entries=total_entries, skipped=skipped_entries, skip_ratio=skip_ratio,
+                 translations_avoided=translations_avoided)
+
+    if stats['inserted']:
+        update_derived_data()
+    return stats
+
+# One in-process ingest pass; long-running deployments use worker.py instead
+def main():
+    if SENTIMENT_SERVER and not SENTIMENT_SERVER_KEY:
+        raise SystemExit("SENTIMENT_SERVER needs SENTIMENT_SERVER_KEY")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    news_store.init_db()
+    aggregates.init_rollups()
+    near_duplicates.init_index()
+    search_index.init_search()
+    poll_schedule.init_schedule()
+    feed_registry.init_registry()
+    feed_registry.import_discovered()
+    language.init_languages()
+    from feed_fetcher import init_validators
+    init_validators()
+    fetch_and_process_feeds()
+
+if __name__ == "__main__":
+    main()
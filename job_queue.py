@@ -0,0 +1,136 @@
+"""Durable SQLite-backed job queue for ingest work.
+
+Jobs are leased rather than popped: a worker that dies mid-job simply lets its lease
+expire and the job becomes available again. Failed jobs are retried with exponential
+backoff until MAX_ATTEMPTS; a job whose lease keeps expiring (its worker crashes) is
+given up after MAX_ATTEMPTS as well. A job with a unique_key is queued at most once, so
+repeated scheduler ticks cannot pile up duplicate work. While one is running another
+may be queued, which is leased only after the running one finishes: work that arrives
+during a run (e.g. rows stored during an update_derived job) is never dropped.
+"""
+import json
+import os
+import random
+import sqlite3
+import time
+from pathlib import Path
+
+import news_store
+
+JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', 'jobs.db')
+LEASE_SECONDS = 600
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30  # seconds before the first retry
+BACKOFF_MAX = 3600
+
+
+def connect(path=None):
+    conn = news_store.connect(path or JOB_QUEUE_PATH)
+    conn.execute('''CREATE TABLE IF NOT EXISTS jobs
+                    (id INTEGER PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, unique_key TEXT,
+                     status TEXT NOT NULL DEFAULT 'queued', attempts INTEGER NOT NULL DEFAULT 0,
+                     run_after REAL NOT NULL, leased_until REAL, lease_owner TEXT, last_error TEXT,
+                     created_at REAL NOT NULL, finished_at REAL)''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, run_after)")
+    # Older queues also covered leased jobs, which dropped jobs enqueued while their twin was running
+    index_sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'idx_jobs_unique'").fetchone()
+    if index_sql and 'leased' in index_sql[0]:
+        conn.execute('DROP INDEX idx_jobs_unique')
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_unique ON jobs (unique_key) WHERE status = 'queued'")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_key_status ON jobs (unique_key, status)")
+    conn.execute('''CREATE TABLE IF NOT EXISTS leader_leases
+                    (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)''')
+    conn.commit()
+    return conn
+
+
+def connect_readonly(path=None):
+    """Read-only connection for observers such as the /metrics scrape: no schema DDL, no commit."""
+    return sqlite3.connect(f'{Path(path or JOB_QUEUE_PATH).absolute().as_uri()}?mode=ro', uri=True, timeout=5)
+
+
+def enqueue(conn, kind, payload, unique_key=None, delay=0):
+    """Queue a job; returns its id, or None when a job with the same unique_key is already queued."""
+    now = time.time()
+    with conn:
+        cursor = conn.execute('''INSERT OR IGNORE INTO jobs (kind, payload, unique_key, run_after, created_at)
+                                 VALUES (?, ?, ?, ?, ?)''',
+                              (kind, json.dumps(payload), unique_key, now + delay, now))
+    return cursor.lastrowid if cursor.rowcount else None
+
+
+def lease(conn, owner, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+    """Atomically claim the next ready job; returns (id, kind, payload, attempts) or None."""
+    now = time.time()
+    # BEGIN IMMEDIATE takes the write lock up front, so two workers never claim the same row
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # An expired lease means the worker died; after max_attempts of those the job is given up
+        conn.execute('''UPDATE jobs SET status = 'failed', last_error = 'lease expired', finished_at = ?,
+                        leased_until = NULL
+                        WHERE status = 'leased' AND leased_until < ? AND attempts >= ?''', (now, now, max_attempts))
+        # A job waits while another job with its unique_key is still running
+        row = conn.execute('''SELECT id, kind, payload, attempts FROM jobs
+                              WHERE ((status = 'queued' AND run_after <= ?) OR (status = 'leased' AND leased_until < ?))
+                                AND (unique_key IS NULL OR NOT EXISTS (
+                                     SELECT 1 FROM jobs AS running
+                                     WHERE running.unique_key = jobs.unique_key AND running.id != jobs.id
+                                       AND running.status = 'leased' AND running.leased_until >= ?))
+                              ORDER BY run_after LIMIT 1''', (now, now, now)).fetchone()
+        if row:
+            conn.execute('''UPDATE jobs SET status = 'leased', leased_until = ?, lease_owner = ?,
+                            attempts = attempts + 1 WHERE id = ?''', (now + lease_seconds, owner, row[0]))
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    if row is None:
+        return None
+    job_id, kind, payload, attempts = row
+    return job_id, kind, json.loads(payload), attempts + 1
+
+
+def complete(conn, job_id):
+    with conn:
+        conn.execute("UPDATE jobs SET status = 'done', finished_at = ?, leased_until = NULL WHERE id = ?",
+                     (time.time(), job_id))
+
+
+def fail(conn, job_id, attempts, error, max_attempts=MAX_ATTEMPTS):
+    """Requeue with exponential backoff and jitter, or give up after max_attempts."""
+    now = time.time()
+    with conn:
+        # A queued job with the same unique_key will do this work, and a second queued one is not allowed
+        superseded = conn.execute('''SELECT 1 FROM jobs JOIN jobs AS twin ON twin.unique_key = jobs.unique_key
+                                     WHERE jobs.id = ? AND twin.status = 'queued' AND twin.id != jobs.id''',
+                                  (job_id,)).fetchone()
+        if attempts >= max_attempts or superseded:
+            conn.execute('''UPDATE jobs SET status = 'failed', last_error = ?, finished_at = ?, leased_until = NULL
+                            WHERE id = ?''', (error, now, job_id))
+        else:
+            delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX) * random.uniform(0.9, 1.1)
+            conn.execute('''UPDATE jobs SET status = 'queued', last_error = ?, run_after = ?, leased_until = NULL
+                            WHERE id = ?''', (error, now + delay, job_id))
+
+
+def depth(conn):
+    """Return {status: count} for the jobs that are still pending."""
+    return dict(conn.execute("SELECT status, COUNT(*) FROM jobs WHERE status IN ('queued', 'leased') GROUP BY status"))
+
+
+def purge_finished(conn, older_than=7 * 86400):
+    with conn:
+        conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                     (time.time() - older_than,))
+
+
+def acquire_leadership(conn, name, owner, ttl):
+    """Hold or take over the named lease; True while this owner is the single leader."""
+    now = time.time()
+    with conn:
+        conn.execute('''INSERT INTO leader_leases (name, owner, expires_at) VALUES (?, ?, ?)
+                        ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                        WHERE leader_leases.owner = excluded.owner OR leader_leases.expires_at < ?''',
+                     (name, owner, now + ttl, now))
+        (current,) = conn.execute('SELECT owner FROM leader_leases WHERE name = ?', (name,)).fetchone()
+    return current == owner
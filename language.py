@@ -0,0 +1,64 @@
+"""Language identification for feed titles, cached per feed.
+
+Single headlines are short, so a feed's language is detected once from a sample of
+its titles joined together, which is far more reliable than per-title detection, and
+stored in feed_languages. Titles of a feed with a confidently detected language are
+routed without further detection until LANGUAGE_TTL passes; titles of mixed or
+uncertain feeds are detected one by one.
+"""
+import time
+
+import news_store
+
+LANGUAGE_TTL = 7 * 86400
+MIN_CONFIDENCE = 0.9
+SAMPLE_SIZE = 20
+
+
+def init_languages(db_path=None):
+    conn = news_store.get_connection(db_path)
+    with conn:
+        conn.execute('''CREATE TABLE IF NOT EXISTS feed_languages
+                        (url TEXT PRIMARY KEY, language TEXT, confidence REAL, detected_at REAL NOT NULL)''')
+
+
+def detect_language(text):
+    """(language code, probability) of the most likely language, or (None, 0.0)."""
+    from langdetect import DetectorFactory, detect_langs
+    from langdetect.lang_detect_exception import LangDetectException
+
+    DetectorFactory.seed = 0  # langdetect is randomized; a fixed seed gives repeatable results
+    try:
+        best = detect_langs(text)[0]
+    except LangDetectException:
+        return None, 0.0
+    return best.lang, best.prob
+
+
+def detect_languages(texts):
+    return [detect_language(text)[0] for text in texts]
+
+
+def feed_language(url, titles, now=None, db_path=None):
+    """The feed's language when one language dominates its titles, else None (cached per feed)."""
+    now = now or time.time()
+    conn = news_store.get_connection(db_path)
+    row = conn.execute('SELECT language, confidence, detected_at FROM feed_languages WHERE url = ?', (url,)).fetchone()
+    if row and now - row[2] < LANGUAGE_TTL:
+        language, confidence, _ = row
+    else:
+        sample = [title for title in titles[:SAMPLE_SIZE] if title]
+        if not sample:
+            return None
+        language, confidence = detect_language(' . '.join(sample))
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO feed_languages VALUES (?, ?, ?, ?)', (url, language, confidence, now))
+    return language if confidence >= MIN_CONFIDENCE else None
+
+
+def title_languages(url, titles, db_path=None):
+    """One language code (or None when unknown) per title of a feed."""
+    language = feed_language(url, titles, db_path=db_path)
+    if language is not None:
+        return [language] * len(titles)
+    return detect_languages(titles)
@@ -0,0 +1,177 @@
+"""Counters and timing histograms, exposed in the Prometheus text format.
+
+Ingest runs in worker processes while /metrics is served by the web tier, so every
+process accumulates metrics in memory and flush() adds them to a shared SQLite file
+(METRICS_PATH). render() flushes the calling process and formats the totals.
+
+    with metrics.timer('ingest_stage_seconds', stage='fetch', feed=url, country=country):
+        ...
+    metrics.inc('ingest_articles_total', 3, outcome='inserted', country=country)
+
+Set PROFILE_DIR to also write a cProfile dump of every ingest run or job there.
+"""
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import news_store
+
+METRICS_PATH = os.getenv('METRICS_PATH', 'metrics.db')
+PROFILE_DIR = os.getenv('PROFILE_DIR')
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+FLUSH_INTERVAL = 10  # seconds between flushes triggered by maybe_flush
+
+_lock = threading.Lock()
+_counters = {}  # (name, labels) -> value added since the last flush
+_histograms = {}  # (name, labels) -> [count per bucket..., +Inf count, sum]
+_stats_seen = {}
+_last_flush = 0.0
+
+
+def _labels(labels):
+    return json.dumps(labels, sort_keys=True, separators=(',', ':'))
+
+
+def inc(name, value=1, **labels):
+    if not value:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        values = _histograms.setdefault(key, [0] * (len(BUCKETS) + 2))
+        # Non-cumulative here; render() accumulates the buckets
+        index = next((i for i, bound in enumerate(BUCKETS) if seconds <= bound), len(BUCKETS))
+        values[index] += 1
+        values[-1] += seconds
+
+
+@contextmanager
+def timer(name, **labels):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def track_stats(prefix, stats):
+    """Count the growth of a cumulative stats dict (BatchTranslator/SentimentScorer.stats)."""
+    with _lock:
+        seen = _stats_seen.setdefault(prefix, {})
+        deltas = {key: value - seen.get(key, 0) for key, value in stats.items()}
+        seen.update(stats)
+    for key, delta in deltas.items():
+        inc(f'{prefix}_{key}_total', delta)
+
+
+def _connect(path):
+    conn = news_store.connect(path or METRICS_PATH)
+    conn.execute('''CREATE TABLE IF NOT EXISTS metric_values
+                    (name TEXT, labels TEXT, bucket INTEGER, value REAL NOT NULL,
+                     PRIMARY KEY (name, labels, bucket))''')
+    return conn
+
+
+def flush(path=None):
+    """Add this process's metrics to the shared totals and reset them."""
+    global _last_flush
+    with _lock:
+        rows = [(name, labels, -1, value) for (name, labels), value in _counters.items()]
+        rows += [(name, labels, bucket, value) for (name, labels), values in _histograms.items()
+                 for bucket, value in enumerate(values) if value]
+        _counters.clear()
+        _histograms.clear()
+        _last_flush = time.monotonic()
+    if not rows:
+        return
+    conn = _connect(path)
+    try:
+        with conn:
+            # bucket -1 is a counter; 0..len(BUCKETS) histogram buckets, len(BUCKETS) + 1 the sum
+            conn.executemany('''INSERT INTO metric_values VALUES (?, ?, ?, ?)
+                                ON CONFLICT (name, labels, bucket) DO UPDATE SET value = value + excluded.value''',
+                             rows)
+    finally:
+        conn.close()
+
+
+def maybe_flush(path=None):
+    if time.monotonic() - _last_flush >= FLUSH_INTERVAL:
+        flush(path)
+
+
+def _format_labels(labels, **extra):
+    labels = {**json.loads(labels), **extra}
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+def render(gauges=(), path=None):
+    """Prometheus text exposition of all flushed totals plus (name, labels, value) gauges."""
+    flush(path)
+    conn = _connect(path)
+    try:
+        rows = conn.execute('SELECT name, labels, bucket, value FROM metric_values ORDER BY name, labels, bucket').fetchall()
+    finally:
+        conn.close()
+    counters = {}
+    histograms = {}
+    for name, labels, bucket, value in rows:
+        if bucket < 0:
+            counters.setdefault(name, []).append((labels, value))
+        else:
+            histograms.setdefault(name, {}).setdefault(labels, [0] * (len(BUCKETS) + 2))[bucket] = value
+
+    lines = []
+    for name, samples in counters.items():
+        lines.append(f'# TYPE {name} counter')
+        lines += [f'{name}{_format_labels(labels)} {value:g}' for labels, value in samples]
+    for name, series in histograms.items():
+        lines.append(f'# TYPE {name} histogram')
+        for labels, values in series.items():
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ('+Inf',), values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, le=bound)} {cumulative:g}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {values[-1]:g}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative:g}')
+    # Cache hit ratios of the translation and sentiment caches, over all processes
+    gauges = list(gauges)
+    for prefix in ('translation', 'sentiment'):
+        requested = sum(value for _, value in counters.get(f'{prefix}_requested_total', []))
+        if requested:
+            hits = sum(value for _, value in counters.get(f'{prefix}_cache_hits_total', []))
+            gauges.append((f'{prefix}_cache_hit_ratio', {}, hits / requested))
+    declared = set()
+    for name, labels, value in gauges:
+        if name not in declared:
+            lines.append(f'# TYPE {name} gauge')
+            declared.add(name)
+        lines.append(f'{name}{_format_labels(_labels(labels))} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+
+@contextmanager
+def profiled(name):
+    """cProfile the block into PROFILE_DIR/<name>_<time>_<pid>.prof when PROFILE_DIR is set."""
+    if not PROFILE_DIR:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(PROFILE_DIR, f'{name}_{time.strftime("%Y%m%d-%H%M%S")}_{os.getpid()}.prof'))
@@ -0,0 +1,44 @@
+"""Bring an existing news.db up to the current schema.
+
+    python migrate.py [--db news.db] [--batch-size 5000]
+"""
+import argparse
+import logging
+
+import aggregates
+import feed_fetcher
+import feed_registry
+import language
+import near_duplicates
+import news_store
+import poll_schedule
+import search_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate news.db to the current schema.')
+    parser.add_argument('--db', default=None)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+
+    news_store.init_db(args.db)
+    updated = news_store.backfill_published_ts(args.batch_size, args.db)
+    near_duplicates.init_index(args.db)
+    search_index.init_search(args.db)
+    poll_schedule.init_schedule(args.db)
+    feed_registry.init_registry(args.db)
+    feed_registry.import_discovered(args.db)
+    language.init_languages(args.db)
+    feed_fetcher.init_validators(args.db)
+    indexed, duplicates = near_duplicates.assign_stories(db_path=args.db)
+    # A rollup table created before the backfill filed old rows under day 0
+    aggregates.init_rollups(args.db)
+    if updated or duplicates:
+        aggregates.rebuild_rollups(args.db)
+    logging.info(f"Migration finished: published_ts backfilled for {updated} rows, "
+                 f"{duplicates} of {indexed} articles linked to an existing story")
+
+
+if __name__ == '__main__':
+    main()
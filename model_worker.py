@@ -0,0 +1,106 @@
+"""Sentiment model server: a small pool of processes holds the model, every tier sends it batches.
+
+    SENTIMENT_SERVER_KEY=... python model_worker.py --processes 2 --backend int8 --address 127.0.0.1:6100
+    SENTIMENT_SERVER=127.0.0.1:6100 SENTIMENT_SERVER_KEY=... python worker.py --processes 8
+
+Each pool process loads the model once, so any number of gunicorn and ingest worker
+processes share --processes model copies instead of holding one each. Clients
+(sentiment.RemoteAnalyzer) connect over multiprocessing.connection, authenticated with
+SENTIMENT_SERVER_KEY, and send whole batches; one thread per connection hands them to
+the pool, so concurrent clients are spread over the processes. Messages are pickles, so
+there is no default key: neither the server nor a client starts without one.
+"""
+import argparse
+import logging
+import os
+import signal
+import threading
+from multiprocessing import Pool
+from multiprocessing.connection import Listener
+
+import metrics
+from sentiment import BACKENDS, SENTIMENT_MODEL, load_analyzer, parse_address
+
+DEFAULT_ADDRESS = '127.0.0.1:6100'
+
+_analyzer = None
+
+
+# Pool processes: load the model once, then score batches
+def init_process(model, backend, threads):
+    global _analyzer
+    import torch
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent coordinates shutdown
+    torch.set_num_threads(threads)  # processes x threads stays within the CPU count
+    _analyzer = load_analyzer(model, backend)
+
+
+def score_batch(texts, batch_size):
+    outputs = _analyzer(texts, batch_size=batch_size or len(texts) or 1, truncation=True)
+    return [{'label': output['label'], 'score': float(output['score'])} for output in outputs]
+
+
+# Connections: one thread per client, requests are (texts, batch_size) tuples
+def serve_client(conn, pool, backend):
+    with conn:
+        while True:
+            try:
+                texts, batch_size = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                with metrics.timer('model_batch_seconds', backend=backend):
+                    result = True, pool.apply(score_batch, (texts, batch_size))
+                metrics.inc('model_texts_total', len(texts), backend=backend)
+            except Exception as e:
+                logging.error(f"Scoring a batch of {len(texts)} titles failed, error: {e}")
+                result = False, str(e)
+            metrics.maybe_flush()
+            try:
+                conn.send(result)
+            except OSError:
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the sentiment model to the web and ingest tiers.')
+    parser.add_argument('--address', default=os.getenv('SENTIMENT_SERVER', DEFAULT_ADDRESS), help='host:port')
+    parser.add_argument('--processes', type=int, default=int(os.getenv('MODEL_WORKERS', 2)))
+    parser.add_argument('--backend', choices=BACKENDS, default=os.getenv('SENTIMENT_BACKEND', 'pytorch'))
+    parser.add_argument('--model', default=SENTIMENT_MODEL)
+    args = parser.parse_args()
+    # Every message is unpickled, so only clients holding the shared key may connect
+    authkey = os.getenv('SENTIMENT_SERVER_KEY')
+    if not authkey:
+        parser.error("SENTIMENT_SERVER_KEY must be set")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+
+    threads = max(1, (os.cpu_count() or 1) // args.processes)
+    pool = Pool(args.processes, initializer=init_process, initargs=(args.model, args.backend, threads))
+    listener = Listener(parse_address(args.address), authkey=authkey.encode('utf-8'))
+    logging.info(f"Serving {args.model} ({args.backend}) from {args.processes} processes on {args.address}")
+
+    signal.signal(signal.SIGTERM, lambda *_: listener.close())
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except OSError:
+                break  # listener closed by SIGTERM
+            except Exception as e:
+                # Failed handshakes (wrong key) must not stop the server
+                logging.error(f"Rejected model worker client, error: {e}")
+                continue
+            threading.Thread(target=serve_client, args=(conn, pool, args.backend), daemon=True).start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        pool.terminate()
+        pool.join()
+        metrics.flush()
+
+
+if __name__ == '__main__':
+    main()
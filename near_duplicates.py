@@ -0,0 +1,127 @@
+"""Near-duplicate story detection with MinHash signatures and LSH banding.
+
+Each article's normalized (translated) title is shingled into character 5-grams and
+summarized by a NUM_PERM-value MinHash signature. The signature is cut into BANDS
+bands whose hashes are stored in story_buckets; two titles are candidates when any
+band matches, so a lookup reads a handful of index entries instead of every title.
+
+An article that matches an earlier one gets news.story_id = the earlier story's id;
+the first article of a story keeps story_id NULL and represents it.
+"""
+import hashlib
+import logging
+import re
+import unicodedata
+
+import numpy as np
+
+import news_store
+
+NUM_PERM = 64
+BANDS = 16  # 4 rows per band: pairs above ~0.5 Jaccard become candidates
+SHINGLE_SIZE = 5
+MATCH_THRESHOLD = 0.5
+_PRIME = np.uint64(4294967311)  # first prime above 2**32, so a * x + b fits in uint64
+
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, 2 ** 32, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2 ** 32, NUM_PERM, dtype=np.uint64)
+
+
+def normalize_title(title):
+    title = unicodedata.normalize('NFKD', title.casefold())
+    title = ''.join(ch for ch in title if not unicodedata.combining(ch))
+    return ' '.join(re.sub(r'[^\w\s]', ' ', title).split())
+
+
+def shingles(title, size=SHINGLE_SIZE):
+    text = normalize_title(title)
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _hash32(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=4).digest(), 'little')
+
+
+def signature(title):
+    hashes = np.fromiter((_hash32(s) for s in shingles(title)), dtype=np.uint64)
+    # One row per permutation, one column per shingle; the minimum is the MinHash value
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def band_hashes(sig):
+    rows = NUM_PERM // BANDS
+    return [int.from_bytes(hashlib.blake2b(sig[band * rows:(band + 1) * rows].tobytes(), digest_size=8).digest(),
+                           'little', signed=True)
+            for band in range(BANDS)]
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the two titles' shingle sets."""
+    return float(np.mean(sig_a == sig_b))
+
+
+def init_index(db_path=None):
+    conn = news_store.get_connection(db_path)
+    with conn:
+        conn.execute('CREATE TABLE IF NOT EXISTS story_signatures (news_id INTEGER PRIMARY KEY, signature BLOB)')
+        conn.execute('CREATE TABLE IF NOT EXISTS story_buckets (band INTEGER, bucket INTEGER, news_id INTEGER)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_story_buckets ON story_buckets (band, bucket)')
+
+
+def _best_match(conn, sig, bands):
+    candidates = set()
+    for band, bucket in enumerate(bands):
+        candidates.update(row[0] for row in conn.execute(
+            'SELECT news_id FROM story_buckets WHERE band = ? AND bucket = ?', (band, bucket)))
+    best_id, best_score = None, MATCH_THRESHOLD
+    for news_id in candidates:
+        (blob,) = conn.execute('SELECT signature FROM story_signatures WHERE news_id = ?', (news_id,)).fetchone()
+        score = similarity(sig, np.frombuffer(blob, dtype=np.uint64))
+        if score >= best_score:
+            best_id, best_score = news_id, score
+    return best_id
+
+
+def find_matches(titles, db_path=None):
+    """Return, per title, the id of an indexed near-duplicate article or None."""
+    conn = news_store.get_connection(db_path)
+    matches = []
+    for title in titles:
+        sig = signature(title)
+        matches.append(_best_match(conn, sig, band_hashes(sig)))
+    return matches
+
+
+def assign_stories(batch_size=1000, db_path=None):
+    """Index articles stored since the last call and link near-duplicates to their story.
+
+    Returns (indexed, duplicates).
+    """
+    conn = news_store.get_connection(db_path)
+    (last_id,) = conn.execute('SELECT COALESCE(MAX(news_id), 0) FROM story_signatures').fetchone()
+    indexed = duplicates = 0
+    while True:
+        rows = conn.execute('SELECT id, title FROM news WHERE id > ? AND title IS NOT NULL ORDER BY id LIMIT ?',
+                            (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        with conn:
+            for news_id, title in rows:
+                sig = signature(title)
+                bands = band_hashes(sig)
+                match = _best_match(conn, sig, bands)
+                if match is not None:
+                    conn.execute('UPDATE news SET story_id = (SELECT COALESCE(story_id, id) FROM news WHERE id = ?) '
+                                 'WHERE id = ?', (match, news_id))
+                    duplicates += 1
+                conn.execute('INSERT INTO story_signatures VALUES (?, ?)', (news_id, sig.tobytes()))
+                conn.executemany('INSERT INTO story_buckets VALUES (?, ?, ?)',
+                                 [(band, bucket, news_id) for band, bucket in enumerate(bands)])
+        indexed += len(rows)
+        last_id = rows[-1][0]
+    if indexed:
+        logging.info(f"Near-duplicates: indexed {indexed} articles, {duplicates} joined an existing story")
+    return indexed, duplicates
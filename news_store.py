@@ -0,0 +1,219 @@
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+
+DB_PATH = os.getenv('NEWS_DB_PATH', 'news.db')
+
+# WAL lets the Flask readers run while the ingest writer holds its transaction;
+# synchronous=NORMAL is durable in WAL mode and only fsyncs at checkpoints.
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536',  # 64 MB page cache
+    'PRAGMA temp_store=MEMORY',
+)
+
+NEWS_COLUMNS = ('country', 'title', 'link', 'published', 'published_ts', 'sentiment', 'political_bias')
+API_FIELDS = ('id', 'country', 'title', 'link', 'published', 'published_ts', 'sentiment', 'political_bias',
+              'story_id')
+
+_local = threading.local()
+
+
+def connect(db_path=None):
+    """Open a new connection with the tuned pragmas applied."""
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=30)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_connection(db_path=None):
+    """Return this thread's reusable connection to the database."""
+    db_path = db_path or DB_PATH
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    if db_path not in connections:
+        connections[db_path] = connect(db_path)
+    return connections[db_path]
+
+
+def close_connections():
+    for conn in getattr(_local, 'connections', {}).values():
+        conn.close()
+    _local.connections = {}
+
+
+def parse_published(published):
+    """Convert an RFC-822 published string to a UTC epoch; 0 when it cannot be parsed."""
+    try:
+        parsed = parsedate_to_datetime(published)
+    except (TypeError, ValueError, IndexError):
+        return 0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)  # "-0000" means UTC with unknown origin
+    return int(parsed.timestamp())
+
+
+def _ensure_columns(conn, columns):
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(news)')}
+    for name, definition in columns:
+        if name not in existing:
+            conn.execute(f'ALTER TABLE news ADD COLUMN {name} {definition}')
+
+
+# Database initialization with indexing
+def init_db(db_path=None):
+    try:
+        conn = get_connection(db_path)
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS news
+                            (id INTEGER PRIMARY KEY, country TEXT, title TEXT, link TEXT UNIQUE, published TEXT, sentiment TEXT,
+                             political_bias TEXT, published_ts INTEGER NOT NULL DEFAULT 0, topic_cluster INTEGER,
+                             story_id INTEGER)''')
+            # Older databases predate some columns
+            _ensure_columns(conn, [('sentiment', 'TEXT'), ('political_bias', 'TEXT'),
+                                   ('published_ts', 'INTEGER NOT NULL DEFAULT 0'), ('topic_cluster', 'INTEGER'),
+                                   ('story_id', 'INTEGER')])
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_country ON news (country)')
+            # published is RFC-822 text, so an index on it only ever ordered lexically
+            conn.execute('DROP INDEX IF EXISTS idx_published')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_published_ts ON news (published_ts, id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_country_published_ts ON news (country, published_ts, id)')
+            # Only rows still waiting for incremental topic clustering
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_unclustered ON news (id) WHERE topic_cluster IS NULL')
+            # Version of the served data, shared by the web and ingest processes; cache keys and ETags embed it
+            conn.execute('''CREATE TABLE IF NOT EXISTS data_version
+                            (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)''')
+            conn.execute('INSERT OR IGNORE INTO data_version VALUES (1, 0)')
+    except sqlite3.Error as e:
+        logging.error(f"Failed to initialize database: {e}")
+
+
+def backfill_published_ts(batch_size=5000, db_path=None):
+    """Parse published into published_ts for rows stored before the column existed.
+
+    Rows are walked in id order and each batch is committed on its own, so the
+    migration can run next to the web tier and be interrupted at any point.
+    Returns the number of rows updated.
+    """
+    conn = get_connection(db_path)
+    last_id = updated = 0
+    while True:
+        rows = conn.execute('SELECT id, published FROM news WHERE id > ? AND published_ts = 0 ORDER BY id LIMIT ?',
+                            (last_id, batch_size)).fetchall()
+        if not rows:
+            return updated
+        changes = [(ts, row_id) for row_id, ts in ((row_id, parse_published(published)) for row_id, published in rows)
+                   if ts]
+        with conn:
+            conn.executemany('UPDATE news SET published_ts = ? WHERE id = ?', changes)
+        updated += len(changes)
+        last_id = rows[-1][0]
+        logging.info(f"Backfilled published_ts up to id {last_id} ({updated} rows updated)")
+
+
+def _news_row(news):
+    if 'published_ts' not in news:
+        news = dict(news, published_ts=parse_published(news['published']))
+    return tuple(news[column] for column in NEWS_COLUMNS)
+
+
+def save_news_batch(articles, db_path=None):
+    """Insert articles with one executemany in a single transaction.
+
+    Returns {'inserted': n, 'ignored': m}; ignored rows are duplicates by link.
+    """
+    articles = list(articles)
+    stats = {'inserted': 0, 'ignored': 0}
+    if not articles:
+        return stats
+    conn = get_connection(db_path)
+    try:
+        with conn:
+            # rowcount counts only rows of this statement; total_changes would include trigger writes
+            cursor = conn.executemany(f'''INSERT OR IGNORE INTO news ({', '.join(NEWS_COLUMNS)})
+                                          VALUES ({', '.join('?' * len(NEWS_COLUMNS))})''',
+                                      [_news_row(news) for news in articles])
+            stats['inserted'] = cursor.rowcount
+            # Committed together with the rows, so no process can cache new data under the old version
+            if stats['inserted']:
+                conn.execute('UPDATE data_version SET version = version + 1')
+        stats['ignored'] = len(articles) - stats['inserted']
+    except sqlite3.Error as e:
+        logging.error(f"Failed to save {len(articles)} news articles: {e}")
+        raise
+    return stats
+
+
+def data_version(db_path=None):
+    row = get_connection(db_path).execute('SELECT version FROM data_version').fetchone()
+    return row[0] if row else 0
+
+
+def bump_data_version(db_path=None):
+    conn = get_connection(db_path)
+    with conn:
+        conn.execute('UPDATE data_version SET version = version + 1')
+
+
+# Keyset pagination over (published_ts, id), newest first
+def encode_cursor(published_ts, row_id):
+    return base64.urlsafe_b64encode(json.dumps([published_ts, row_id]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        published_ts, row_id = map(int, json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))))
+        if not all(-2 ** 63 <= value < 2 ** 63 for value in (published_ts, row_id)):
+            raise ValueError(token)  # SQLite integers are 64-bit
+        return published_ts, row_id
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {token}")
+
+
+def query_news(country=None, since=None, until=None, sentiment=None, political_bias=None, collapse=False,
+               fields=API_FIELDS, limit=100, cursor=None, db_path=None):
+    """Return (rows as dicts, next cursor or None) for one page of the news table.
+
+    since/until are UTC epoch seconds (inclusive/exclusive); collapse keeps only the
+    first article of each near-duplicate story. The page is read with an index range
+    scan, so its cost does not grow with the size of the table.
+    """
+    where, params = [], []
+    if collapse:
+        where.append('story_id IS NULL')
+    for column, value in (('country', country), ('sentiment', sentiment), ('political_bias', political_bias)):
+        if value:
+            where.append(f'{column} = ?')
+            params.append(value)
+    if since is not None:
+        where.append('published_ts >= ?')
+        params.append(since)
+    if until is not None:
+        where.append('published_ts < ?')
+        params.append(until)
+    if cursor:
+        published_ts, row_id = decode_cursor(cursor)
+        where.append('(published_ts < ? OR (published_ts = ? AND id < ?))')
+        params.extend([published_ts, published_ts, row_id])
+
+    selected = list(dict.fromkeys(['published_ts', 'id', *fields]))
+    query = f'SELECT {", ".join(selected)} FROM news'
+    if where:
+        query += ' WHERE ' + ' AND '.join(where)
+    query += ' ORDER BY published_ts DESC, id DESC LIMIT ?'
+    params.append(limit + 1)
+
+    rows = get_connection(db_path).execute(query, params).fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][0], rows[-1][1])
+    return [{field: row[selected.index(field)] for field in fields} for row in rows], next_cursor
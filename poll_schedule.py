@@ -0,0 +1,149 @@
+"""Adaptive per-feed polling schedule.
+
+Each poll learns the feed's publish rate from the `published` times of the entries it
+returned (an exponentially weighted average across polls) and schedules the next poll
+so that about TARGET_NEW_ITEMS new entries are expected by then. A feed's own `<ttl>`
+and the response's Cache-Control max-age are honoured as lower bounds, the interval is
+clamped to [MIN_INTERVAL, MAX_INTERVAL], and jitter keeps feeds from polling in lockstep.
+
+    python poll_schedule.py      # print the computed next-poll times
+"""
+import calendar
+import logging
+import random
+import time
+
+import news_store
+
+MIN_INTERVAL = 300  # seconds
+MAX_INTERVAL = 6 * 3600
+DEFAULT_INTERVAL = 3600  # until a feed has published enough entries to estimate a rate
+TARGET_NEW_ITEMS = 2
+RATE_WINDOW = 7 * 86400  # entries older than this say little about the current pace
+RATE_SMOOTHING = 0.5  # weight of the newest estimate
+JITTER = 0.1
+
+
+def init_schedule(db_path=None):
+    conn = news_store.get_connection(db_path)
+    with conn:
+        conn.execute('''CREATE TABLE IF NOT EXISTS feed_schedule
+                        (url TEXT PRIMARY KEY, rate REAL, interval REAL NOT NULL, hint REAL,
+                         next_poll_at REAL NOT NULL, last_polled_at REAL, last_status INTEGER)''')
+
+
+def entry_timestamps(feed):
+    """Epoch seconds of every entry that carries a parseable published/updated time."""
+    timestamps = []
+    for entry in feed.entries:
+        parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+        if parsed:
+            timestamps.append(calendar.timegm(parsed))
+    return timestamps
+
+
+def publish_rate(timestamps, now, window=RATE_WINDOW):
+    """Entries per second over the span covered by the feed, or None with too little history."""
+    recent = [ts for ts in timestamps if now - window <= ts <= now]
+    if len(recent) < 2:
+        return None
+    # Measured up to now, so a feed that has gone quiet slows down even before new entries arrive
+    return len(recent) / max(now - min(recent), MIN_INTERVAL)
+
+
+def feed_hint(result):
+    """Longest refresh interval the publisher asks for (RSS <ttl> or Cache-Control max-age)."""
+    hints = [result.get('max_age') or 0]
+    if result.get('feed') is not None:
+        try:
+            hints.append(int(result['feed'].feed.get('ttl', 0)) * 60)
+        except (TypeError, ValueError):
+            pass
+    return max(hints) or None
+
+
+def compute_interval(rate, hint=None):
+    interval = TARGET_NEW_ITEMS / rate if rate else DEFAULT_INTERVAL
+    if hint:
+        interval = max(interval, hint)
+    return min(max(interval, MIN_INTERVAL), MAX_INTERVAL)
+
+
+def record_poll(result, now=None, db_path=None):
+    """Update a feed's rate estimate after a poll and schedule its next poll; returns the delay."""
+    now = now or time.time()
+    conn = news_store.get_connection(db_path)
+    previous = conn.execute('SELECT rate, interval, hint FROM feed_schedule WHERE url = ?',
+                            (result['url'],)).fetchone()
+    rate, interval, hint = previous or (None, DEFAULT_INTERVAL, None)
+
+    if result.get('error'):
+        # Failing feeds back off; their rate estimate is kept for when they recover
+        interval = min(max(interval, MIN_INTERVAL) * 2, MAX_INTERVAL)
+    else:
+        if result.get('feed') is not None:
+            observed = publish_rate(entry_timestamps(result['feed']), now)
+            if observed is not None:
+                rate = observed if rate is None else RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * rate
+        hint = feed_hint(result) or hint
+        interval = compute_interval(rate, hint)
+
+    delay = interval * random.uniform(1 - JITTER, 1 + JITTER)
+    with conn:
+        conn.execute('''INSERT OR REPLACE INTO feed_schedule
+                        (url, rate, interval, hint, next_poll_at, last_polled_at, last_status)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                     (result['url'], rate, interval, hint, now + delay, now, result.get('status')))
+    return delay
+
+
+def due_feeds(feeds, now=None, db_path=None):
+    """Return {country: [feed urls]} of the feeds whose next poll is due; unknown feeds are due."""
+    now = now or time.time()
+    next_polls = dict(news_store.get_connection(db_path).execute('SELECT url, next_poll_at FROM feed_schedule'))
+    due = {}
+    for country, feed_urls in feeds.items():
+        urls = [url for url in feed_urls if next_polls.get(url, 0) <= now]
+        if urls:
+            due[country] = urls
+    return due
+
+
+def seconds_until_next(feeds, now=None, db_path=None):
+    """Seconds until the earliest scheduled poll among feeds (0 when one is due)."""
+    now = now or time.time()
+    next_polls = dict(news_store.get_connection(db_path).execute('SELECT url, next_poll_at FROM feed_schedule'))
+    urls = [url for feed_urls in feeds.values() for url in feed_urls]
+    if not urls:
+        return DEFAULT_INTERVAL
+    return max(min(next_polls.get(url, 0) for url in urls) - now, 0)
+
+
+def next_polls(db_path=None):
+    """The computed schedule, soonest first, for inspection."""
+    rows = news_store.get_connection(db_path).execute(
+        '''SELECT url, rate, interval, hint, next_poll_at, last_polled_at, last_status
+           FROM feed_schedule ORDER BY next_poll_at''').fetchall()
+    return [{
+        'url': url,
+        'items_per_hour': round(rate * 3600, 2) if rate else None,
+        'interval': round(interval),
+        'hint': hint,
+        'next_poll_at': next_poll_at,
+        'last_polled_at': last_polled_at,
+        'last_status': last_status,
+    } for url, rate, interval, hint, next_poll_at, last_polled_at, last_status in rows]
+
+
+def main():
+    init_schedule()
+    now = time.time()
+    for row in next_polls():
+        rate = f"{row['items_per_hour']}/h" if row['items_per_hour'] is not None else 'unknown'
+        print(f"{row['url']}: next poll in {max(row['next_poll_at'] - now, 0):.0f}s "
+              f"(every ~{row['interval']}s, rate {rate}, last status {row['last_status']})")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    main()
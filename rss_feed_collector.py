@@ -1,67 +1,54 @@
-import feedparser
-from googletrans import Translator
 import time
-from googlesearch import search
 import logging
-import json
-
-# Naplózás beállítása
-logging.basicConfig(filename='rss_feed_log.log', level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
-
-# Országok és kulcsszavak az RSS feed kereséséhez
-countries = {
-    "Hungary": "Magyarország híroldal RSS feed",
-    "Serbia": "Szerbia híroldal RSS feed",
-    "Slovakia": "Szlovákia híroldal RSS feed",
-    "Slovenia": "Szlovénia híroldal RSS feed",
-    "Austria": "Ausztria híroldal RSS feed",
-    "Poland": "Lengyelország híroldal RSS feed",
-    "Czech Republic": "Csehország híroldal RSS feed",
-    "Romania": "Románia híroldal RSS feed"
-}
-
-# Friss RSS feedek országonként
-rss_feeds = {
-    "Hungary": ["https://index.hu/24ora/rss", "https://hvg.hu/rss/rss.html"],
-    "Serbia": ["https://www.rts.rs/page/stories/sr/rss.html", "https://www.b92.net/info/rss/"],
-    "Slovakia": ["https://www.aktuality.sk/rss/"],
-    "Slovenia": ["https://www.rtvslo.si/rss"],
-    "Austria": ["https://www.diepresse.com/rss"],
-    "Poland": ["https://www.tvn24.pl/najnowsze.xml"],
-    "Czech Republic": ["https://www.ceskatelevize.cz/rss/"],
-    "Romania": ["https://www.digi24.ro/rss"]
-}
-
-translator = Translator()
-translation_cache = {}
-rss_results = {}
+import feed_registry
+import metrics
+import poll_schedule
+from feed_fetcher import fetch_feed
+from translation import BatchTranslator, GoogleBackend
+
+# A fordítások tartós cache-be kerülnek, így újraindítás után sem fordítunk újra; a fordító az első használatkor jön létre
+_translator = None
+
+
+def get_translator():
+    global _translator
+    if _translator is None:
+        _translator = BatchTranslator(GoogleBackend())
+    return _translator
 
 
 def translate_text(text, target_language="hu"):
     """Fordítja a szöveget a megadott nyelvre, cache-eli az eredményt"""
-    if text in translation_cache:
-        return translation_cache[text]
-    try:
-        translated = translator.translate(text, dest=target_language)
-        translation_cache[text] = translated.text
-        return translated.text
-    except Exception as e:
-        logging.error(f"Hiba történt a fordítás közben: {e}")
-        return text  # Ha hiba van, visszaadjuk az eredeti szöveget
+    return get_translator().translate([text], target_language)[0]
 
 
-def fetch_and_translate_news():
+def translate_texts(texts, target_language="hu"):
+    """Egy feed összes címét kötegelve fordítja; hiba esetén az eredeti szöveg marad"""
+    return get_translator().translate(texts, target_language)
+
+
+def fetch_and_translate_news(feeds_by_country=None):
     """RSS feedek begyűjtése és a hírek fordítása"""
-    for country, feeds in rss_feeds.items():
+    for country, feeds in (feeds_by_country or feed_registry.load_feeds()).items():
         print(f"\nOrszág: {country}")
         for feed in feeds:
             try:
-                # RSS feed feldolgozása
-                d = feedparser.parse(feed)
-                if 'entries' in d and d.entries:
-                    for entry in d.entries:
+                # RSS feed feldolgozása; minden letöltés frissíti a feed ütemezését
+                result = fetch_feed(feed)
+                poll_schedule.record_poll(result)
+                feed_registry.record_fetch(result)
+                labels = {'feed': feed, 'country': country}
+                metrics.observe('ingest_stage_seconds', result['elapsed'] - result['parse_elapsed'], stage='fetch', **labels)
+                metrics.observe('ingest_stage_seconds', result['parse_elapsed'], stage='parse', **labels)
+                if result['error']:
+                    raise RuntimeError(result['error'])
+                d = result['feed']
+                if d is not None and d.entries:
+                    with metrics.timer('ingest_stage_seconds', stage='translate', **labels):
+                        translated_titles = translate_texts([entry.get('title', '') for entry in d.entries])
+                    metrics.track_stats('translation', get_translator().stats)
+                    for entry, translated_title in zip(d.entries, translated_titles):
                         try:
-                            translated_title = translate_text(entry.title)
                             print(f"Fordított cím: {translated_title}")
                             print(f"Eredeti link: {entry.link}")
                             print(f"Megjelenés: {entry.published if 'published' in entry else 'Nincs megadva'}")
@@ -72,32 +59,38 @@ def fetch_and_translate_news():
                     print(f"Nem találhatóak bejegyzések ebben a feedben: {feed}")
             except Exception as e:
                 logging.error(f"Hiba történt a feed betöltése közben: {e}")
+    # Az időmérések a közös metrics.db-be kerülnek, a /metrics végponton látszanak
+    metrics.flush()
 
 
-def search_rss_feeds():
-    """RSS feedek keresése a megadott országok számára"""
-    for country, query in countries.items():
-        print(f"Keresés {country} híroldalakra...")
-        rss_results[country] = []
-        try:
-            for result in search(query, num_results=10):
-                rss_results[country].append(result)
-        except Exception as e:
-            logging.error(f"Hiba történt a keresés közben {country} esetén: {e}")
+def collect():
+    """Az esedékes feedek begyűjtése a végtelenségig; a gyakran frissülőket sűrűbben, a csendeseket ritkábban"""
+    poll_schedule.init_schedule()
+    try:
+        while True:
+            # A nyilvántartás változásai (új, kikapcsolt vagy visszaléptetett feedek) újraindítás nélkül érvényesek
+            rss_feeds = feed_registry.load_feeds()
+            due = poll_schedule.due_feeds(rss_feeds)
+            if due:
+                fetch_and_translate_news(due)
+            time.sleep(max(poll_schedule.seconds_until_next(rss_feeds), 1))
+    except KeyboardInterrupt:
+        print("A program leállt.")
 
-    # Eredmények mentése JSON fájlba
-    with open('rss_search_results.json', 'w') as f:
-        json.dump(rss_results, f, indent=4)
 
+def main():
+    # Naplózás beállítása
+    logging.basicConfig(filename='rss_feed_log.log', level=logging.ERROR,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    feed_registry.init_registry()
 
-if __name__ == "__main__":
-    # Első lépés: keresés RSS feedekre (ha szükséges)
+    # Első lépés: keresés RSS feedekre (ha szükséges); a keresés egyetlen megvalósítása az rss_feed_search-ben van
+    from rss_feed_search import search_rss_feeds
     search_rss_feeds()
 
     # Második lépés: hírek begyűjtése és fordítása
-    try:
-        while True:
-            fetch_and_translate_news()
-            time.sleep(600)  # 10 percenként frissíti a híreket
-    except KeyboardInterrupt:
-        print("A program leállt.")
\ No newline at end of file
+    collect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Full-text search over stored articles with an SQLite FTS5 index.
+
+news_fts is an external-content FTS5 table over news.title, kept in sync by
+triggers, so every writer (ingest runs, migrations) updates it in the same
+transaction. Further text columns, e.g. summaries, can be added to FTS_COLUMNS.
+"""
+import html
+import logging
+import re
+import sqlite3
+
+import news_store
+
+FTS_COLUMNS = ('title',)
+SNIPPET_TOKENS = 12
+# Highlight markers FTS5 puts around matches; replaced by <mark> tags after HTML-escaping the title
+MARK_START, MARK_END = '\x02', '\x03'
+MAX_PAGE_SIZE = 100
+MAX_RESULTS = 10_000  # deepest match reachable by paging; OFFSET walks every skipped match
+
+
+def init_search(db_path=None):
+    """Create the FTS5 index and its triggers; an older database is indexed once."""
+    try:
+        conn = news_store.get_connection(db_path)
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'news_fts'").fetchone()
+        columns = ', '.join(FTS_COLUMNS)
+        new_columns = ', '.join(f'new.{column}' for column in FTS_COLUMNS)
+        old_columns = ', '.join(f'old.{column}' for column in FTS_COLUMNS)
+        with conn:
+            conn.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5
+                             ({columns}, content='news', content_rowid='id',
+                              tokenize='unicode61 remove_diacritics 2')''')
+            conn.execute(f'''CREATE TRIGGER IF NOT EXISTS news_fts_insert AFTER INSERT ON news BEGIN
+                                 INSERT INTO news_fts (rowid, {columns}) VALUES (new.id, {new_columns});
+                             END''')
+            conn.execute(f'''CREATE TRIGGER IF NOT EXISTS news_fts_delete AFTER DELETE ON news BEGIN
+                                 INSERT INTO news_fts (news_fts, rowid, {columns}) VALUES ('delete', old.id, {old_columns});
+                             END''')
+            conn.execute(f'''CREATE TRIGGER IF NOT EXISTS news_fts_update AFTER UPDATE OF {columns} ON news BEGIN
+                                 INSERT INTO news_fts (news_fts, rowid, {columns}) VALUES ('delete', old.id, {old_columns});
+                                 INSERT INTO news_fts (rowid, {columns}) VALUES (new.id, {new_columns});
+                             END''')
+            if not exists:
+                conn.execute("INSERT INTO news_fts (news_fts) VALUES ('rebuild')")
+    except sqlite3.Error as e:
+        logging.error(f"Failed to initialize search index: {e}")
+
+
+def to_fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, a trailing * keeps a prefix search."""
+    terms = []
+    for word in re.findall(r'[\w*]+', text):
+        prefix = word.endswith('*')
+        word = word.strip('*')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return ' '.join(terms)
+
+
+def search(text, country=None, since=None, until=None, limit=20, page=1, db_path=None):
+    """Return one page of bm25-ranked matches with highlighted, HTML-escaped title snippets."""
+    if page < 1 or page * limit > MAX_RESULTS:
+        raise ValueError(f"Only the first {MAX_RESULTS} matches can be paged through")
+    fts_query = to_fts_query(text)
+    if not fts_query:
+        return []
+    query = f'''SELECT news.id, news.country, news.title, news.link, news.published, news.published_ts,
+                       snippet(news_fts, 0, '{MARK_START}', '{MARK_END}', '…', {SNIPPET_TOKENS}), bm25(news_fts)
+                FROM news_fts JOIN news ON news.id = news_fts.rowid
+                WHERE news_fts MATCH ?'''
+    params = [fts_query]
+    if country:
+        query += ' AND news.country = ?'
+        params.append(country)
+    if since is not None:
+        query += ' AND news.published_ts >= ?'
+        params.append(since)
+    if until is not None:
+        query += ' AND news.published_ts < ?'
+        params.append(until)
+    query += ' ORDER BY bm25(news_fts) LIMIT ? OFFSET ?'
+    params.extend([limit, (page - 1) * limit])
+
+    rows = news_store.get_connection(db_path).execute(query, params).fetchall()
+    keys = ('id', 'country', 'title', 'link', 'published', 'published_ts', 'snippet', 'rank')
+    return [dict(zip(keys, row), snippet=highlight(row[6])) for row in rows]
+
+
+def highlight(snippet):
+    """HTML-safe snippet: feed titles are escaped, only the match markers become <mark> tags."""
+    return html.escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
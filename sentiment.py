@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+SENTIMENT_MODEL = 'nlptown/bert-base-multilingual-uncased-sentiment'
+BACKENDS = ('pytorch', 'int8')
+DEFAULT_BATCH_SIZE = 32
+MAX_CACHE_ENTRIES = 100_000
+
+
+def load_analyzer(model=SENTIMENT_MODEL, backend='pytorch'):
+    """A transformers sentiment pipeline; backend 'int8' dynamically quantizes its Linear layers for CPU."""
+    import torch
+    from transformers import pipeline
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown sentiment backend {backend!r}, expected one of {BACKENDS}")
+    if backend == 'pytorch':
+        device = 0 if torch.cuda.is_available() else -1  # Use GPU if available, otherwise CPU
+        return pipeline('sentiment-analysis', model=model, device=device)
+    analyzer = pipeline('sentiment-analysis', model=model, device=-1)
+    analyzer.model = torch.ao.quantization.quantize_dynamic(analyzer.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return analyzer
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+class RemoteAnalyzer:
+    """Pipeline-compatible client of model_worker.py; keeps one connection per thread."""
+
+    def __init__(self, address, authkey):
+        # The server unpickles every message, so it is never reachable without the shared key
+        if not authkey:
+            raise ValueError("SENTIMENT_SERVER_KEY must be set to use the model worker")
+        self.address = parse_address(address) if isinstance(address, str) else address
+        self.authkey = authkey.encode('utf-8') if isinstance(authkey, str) else authkey
+        self._local = threading.local()
+
+    def __call__(self, texts, batch_size=None, truncation=True):
+        from multiprocessing.connection import Client
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = Client(self.address, authkey=self.authkey)
+        try:
+            conn.send((list(texts), batch_size))
+            ok, result = conn.recv()
+        except (EOFError, OSError):
+            # The server went away; the next call reconnects
+            self._local.conn = None
+            raise
+        if not ok:
+            raise RuntimeError(f"Model worker failed: {result}")
+        return result
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class SentimentScorer:
+    """Scores titles with a transformers sentiment pipeline in length-sorted batches.
+
+    Known titles are answered from a content-hash LRU cache and never reach the model.
+    """
+
+    def __init__(self, analyzer, batch_size=DEFAULT_BATCH_SIZE, max_cache_entries=MAX_CACHE_ENTRIES):
+        self.analyzer = analyzer
+        self.batch_size = batch_size
+        self.max_cache_entries = max_cache_entries
+        self.cache = OrderedDict()
+        self.stats = {'requested': 0, 'cache_hits': 0, 'scored': 0, 'batches': 0}
+
+    def _remember(self, key, label):
+        self.cache[key] = label
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.max_cache_entries:
+            self.cache.popitem(last=False)
+
+    def score(self, texts):
+        """Return one sentiment label per text, in input order."""
+        texts = list(texts)
+        self.stats['requested'] += len(texts)
+        keys = [content_hash(text) for text in texts]
+
+        labels = {}
+        for key in keys:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                labels[key] = self.cache[key]
+        self.stats['cache_hits'] += sum(1 for key in keys if key in labels)
+
+        # Similar lengths in one batch keep the tokenizer's padding small
+        missing = {key: text for key, text in zip(keys, texts) if key not in labels}
+        ordered = sorted(missing.items(), key=lambda item: len(item[1]))
+        for start in range(0, len(ordered), self.batch_size):
+            batch = ordered[start:start + self.batch_size]
+            outputs = self.analyzer([text for _, text in batch], batch_size=len(batch), truncation=True)
+            self.stats['batches'] += 1
+            for (key, _), output in zip(batch, outputs):
+                labels[key] = output['label']
+                self._remember(key, output['label'])
+        self.stats['scored'] += len(missing)
+        if missing:
+            logging.info(f"Scored {len(missing)} titles in {-(-len(missing) // self.batch_size)} batches, "
+                         f"{len(texts) - len(missing)} served from cache")
+        return [labels[key] for key in keys]
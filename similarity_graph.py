@@ -0,0 +1,87 @@
+"""Sparse top-k cosine similarity edges between TF-IDF rows.
+
+Rows are expected to be L2-normalized (TfidfVectorizer / TopicModel output), so a
+sparse dot product is the cosine similarity. Similarities are computed one block of
+rows at a time and only the k strongest edges per row above the threshold are kept,
+so peak memory is one block's sparse product plus N * k edges instead of N * N.
+"""
+import numpy as np
+
+DEFAULT_K = 10
+DEFAULT_THRESHOLD = 0.1
+BLOCK_SIZE = 1024
+BUCKET_SIZE = 512
+
+
+def _top_k_per_row(rows, cols, values, k):
+    """Keep the k largest values of every row; inputs are parallel 1-d arrays."""
+    if not len(values):
+        return rows, cols, values
+    order = np.lexsort((-values, rows))
+    rows, cols, values = rows[order], cols[order], values[order]
+    # Rank of each entry inside its row, computed without a Python loop
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    run_lengths = np.diff(np.r_[starts, len(rows)])
+    rank = np.arange(len(rows)) - np.repeat(starts, run_lengths)
+    keep = rank < k
+    return rows[keep], cols[keep], values[keep]
+
+
+def _block_edges(X, row_ids, candidate_ids, k, threshold):
+    """Exact top-k edges from row_ids to candidate_ids (both index arrays into X)."""
+    similarities = (X[row_ids] @ X[candidate_ids].T).tocoo()
+    rows = row_ids[similarities.row]
+    cols = candidate_ids[similarities.col]
+    mask = (similarities.data > threshold) & (rows != cols)
+    return _top_k_per_row(rows[mask], cols[mask], similarities.data[mask], k)
+
+
+def _merge(edges, k):
+    if not edges:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    rows, cols, values = (np.concatenate(part) for part in zip(*edges))
+    return _top_k_per_row(rows, cols, values, k)
+
+
+def _lsh_buckets(X, n_bits, seed):
+    # Random-hyperplane signatures: rows with a high cosine tend to share a bucket
+    rng = np.random.default_rng(seed)
+    planes = rng.standard_normal((X.shape[1], n_bits)).astype(np.float32)
+    signs = np.asarray(X @ planes) > 0
+    return signs.dot(1 << np.arange(n_bits))
+
+
+def top_k_edges(X, k=DEFAULT_K, threshold=DEFAULT_THRESHOLD, block_size=BLOCK_SIZE,
+                approximate=False, n_bits=None, n_tables=4, seed=42):
+    """Return undirected edges (i, j, weight) with i < j as three numpy arrays.
+
+    An edge is kept when it is among the k strongest of either endpoint. With
+    approximate=True only rows sharing an LSH bucket in one of n_tables tables are
+    compared, which trades a little recall for far fewer dot products; by default
+    n_bits is chosen so that a bucket holds about BUCKET_SIZE rows.
+    """
+    X = X.tocsr()
+    n = X.shape[0]
+    all_ids = np.arange(n)
+    edges = []
+    if not approximate:
+        for start in range(0, n, block_size):
+            edges.append(_block_edges(X, all_ids[start:start + block_size], all_ids, k, threshold))
+    else:
+        n_bits = n_bits or max(1, int(np.log2(max(n // BUCKET_SIZE, 1))))
+        for table in range(n_tables):
+            buckets = _lsh_buckets(X, n_bits, seed + table)
+            order = np.argsort(buckets, kind='stable')
+            boundaries = np.flatnonzero(np.r_[True, buckets[order][1:] != buckets[order][:-1], True])
+            for begin, end in zip(boundaries[:-1], boundaries[1:]):
+                members = order[begin:end]
+                for start in range(0, len(members), block_size):
+                    edges.append(_block_edges(X, members[start:start + block_size], members, k, threshold))
+    rows, cols, values = _merge(edges, k)
+
+    # Symmetrize: each unordered pair once, with i < j
+    low, high = np.minimum(rows, cols), np.maximum(rows, cols)
+    pairs, index = np.unique(np.stack([low, high], axis=1), axis=0, return_index=True)
+    if not len(pairs):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    return pairs[:, 0], pairs[:, 1], values[index]
@@ -0,0 +1,78 @@
+"""Headline similarity graph (sociogram), rendered off-request.
+
+The spring layout is quadratic in the node count, so the graph is built at derived-data
+time over the MAX_NODES most recently clustered articles, never in a request handler.
+Every build writes a new versioned PNG to GRAPH_DIR (temporary file + os.replace, so a
+reader never sees a half-written image); /visualize only serves the newest one. The
+previous file is kept so a page rendered just before a rebuild still finds its image.
+SOCIAL_GRAPH_DIR overrides the directory, which v1 serves under /social_graph/.
+"""
+import logging
+import os
+import time
+
+import similarity_graph
+
+GRAPH_DIR = os.getenv('SOCIAL_GRAPH_DIR', os.path.join('static', 'social_graph'))
+MAX_NODES = 300
+KEEP_VERSIONS = 2
+PREFIX = 'social_network_'
+
+
+def _versions(directory):
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    # Millisecond stamps of equal width sort chronologically
+    return sorted(name for name in names if name.startswith(PREFIX) and name.endswith('.png'))
+
+
+def latest_graph(directory=None):
+    """Path of the newest rendered graph, or None before the first build."""
+    directory = directory or GRAPH_DIR
+    versions = _versions(directory)
+    return os.path.join(directory, versions[-1]) if versions else None
+
+
+def build_graph(db_path=None, directory=None, max_nodes=MAX_NODES, k=similarity_graph.DEFAULT_K,
+                threshold=similarity_graph.DEFAULT_THRESHOLD):
+    """Render the graph of the newest max_nodes clustered articles; returns its path or None."""
+    import matplotlib
+    import networkx as nx
+    from matplotlib.figure import Figure
+
+    import topic_clustering
+
+    directory = directory or GRAPH_DIR
+    titles, labels = topic_clustering.load_clusters(db_path, limit=max_nodes)
+    if not titles:
+        return None
+    X = topic_clustering.load_model().transform(titles)
+
+    G = nx.Graph()
+    for i, label in enumerate(labels):
+        G.add_node(i, label=f"{i}: {label}")
+    rows, cols, weights = similarity_graph.top_k_edges(X, k=k, threshold=threshold)
+    G.add_weighted_edges_from(zip(rows.tolist(), cols.tolist(), weights.tolist()))
+
+    pos = nx.spring_layout(G, seed=42)
+    fig = Figure(figsize=(12, 12))
+    ax = fig.subplots()
+    edges = G.edges(data=True)
+    nx.draw_networkx_nodes(G, pos, ax=ax, node_size=120, node_color=list(labels),
+                           cmap=matplotlib.colormaps['viridis'])
+    nx.draw_networkx_edges(G, pos, ax=ax, edgelist=edges, width=[edge[2]['weight'] * 3 for edge in edges], alpha=0.5)
+    nx.draw_networkx_labels(G, pos, ax=ax, labels=nx.get_node_attributes(G, 'label'), font_size=6)
+    ax.set_title('Hírek Szociogramja Klaszterekkel')
+    ax.set_axis_off()
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{PREFIX}{int(time.time() * 1000)}.png')
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    fig.savefig(tmp_path, format='png')
+    os.replace(tmp_path, path)
+    for name in _versions(directory)[:-KEEP_VERSIONS]:
+        os.remove(os.path.join(directory, name))
+    logging.info(f"Social graph: {len(titles)} articles, {len(weights)} edges")
+    return path
@@ -0,0 +1,28 @@
+"""Every database and cache points at a temporary directory before an application
+module is imported, since they read their paths at import time."""
+from email.utils import formatdate
+
+import pytest
+
+from benchmarks.fixtures import isolated_environment
+
+isolated_environment()
+
+
+def make_records(count, published_ts=1_700_000_000, prefix='article', country='Hungary'):
+    """count storable news records; published_ts may be one value or a list."""
+    stamps = published_ts if isinstance(published_ts, list) else [published_ts] * count
+    return [{'country': country, 'title': f'{prefix} {index}', 'link': f'https://example.com/{prefix}/{index}',
+             'published': formatdate(stamp, usegmt=True), 'published_ts': stamp,
+             'sentiment': '3 stars', 'political_bias': 'left'}
+            for index, stamp in enumerate(stamps)]
+
+
+@pytest.fixture
+def news_db(tmp_path):
+    import news_store
+
+    path = str(tmp_path / 'news.db')
+    news_store.init_db(path)
+    yield path
+    news_store.close_connections()
@@ -0,0 +1,80 @@
+import os
+import threading
+
+import pytest
+
+import analytics_snapshot
+import news_store
+from conftest import make_records
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path):
+    return str(tmp_path / 'snapshots')
+
+
+def set_clusters(db, labels):
+    conn = news_store.get_connection(db)
+    with conn:
+        conn.executemany('UPDATE news SET topic_cluster = ? WHERE id = ?',
+                         [(label, row_id) for row_id, label in enumerate(labels, start=1)])
+
+
+def versions(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith('v'))
+
+
+def test_refresh_skips_unchanged_data_and_rebuilds_after_a_write(news_db, snapshot_dir):
+    news_store.save_news_batch(make_records(3), news_db)
+    first = analytics_snapshot.refresh_snapshot(news_db, snapshot_dir, max_age=0)
+    assert first is not None
+    assert analytics_snapshot.refresh_snapshot(news_db, snapshot_dir, max_age=0) is None
+
+    news_store.save_news_batch(make_records(2, prefix='later'), news_db)
+    assert analytics_snapshot.refresh_snapshot(news_db, snapshot_dir, max_age=3600) is None
+    second = analytics_snapshot.refresh_snapshot(news_db, snapshot_dir, max_age=0)
+    assert second not in (None, first)
+    assert analytics_snapshot.load_snapshot(snapshot_dir).meta['rows'] == 5
+
+
+def test_build_keeps_only_the_newest_versions(news_db, snapshot_dir):
+    built = []
+    for batch in range(analytics_snapshot.KEEP_VERSIONS + 2):
+        news_store.save_news_batch(make_records(1, prefix=f'batch{batch}'), news_db)
+        built.append(analytics_snapshot.build_snapshot(news_db, snapshot_dir))
+    assert versions(snapshot_dir) == built[-analytics_snapshot.KEEP_VERSIONS:]
+    with open(os.path.join(snapshot_dir, 'CURRENT')) as f:
+        assert f.read() == built[-1]
+
+
+def test_concurrent_refreshes_build_once(news_db, snapshot_dir):
+    news_store.save_news_batch(make_records(3), news_db)
+    results = []
+
+    def refresh():
+        results.append(analytics_snapshot.refresh_snapshot(news_db, snapshot_dir, max_age=0))
+        news_store.close_connections()
+
+    threads = [threading.Thread(target=refresh) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len([version for version in results if version]) == 1
+    assert len(versions(snapshot_dir)) == 1
+
+
+def test_clusters_returns_the_newest_clustered_rows(news_db, snapshot_dir):
+    news_store.save_news_batch(make_records(5), news_db)
+    set_clusters(news_db, [0, None, 1, 2, 0])
+    analytics_snapshot.build_snapshot(news_db, snapshot_dir)
+    snapshot = analytics_snapshot.load_snapshot(snapshot_dir)
+
+    titles, labels = snapshot.clusters()
+    assert titles == ['article 0', 'article 2', 'article 3', 'article 4']
+    assert labels.tolist() == [0, 1, 2, 0]
+
+    titles, labels = snapshot.clusters(limit=2)
+    assert titles == ['article 3', 'article 4']
+    assert labels.tolist() == [2, 0]
+    assert snapshot.clusters(limit=0)[0] == []
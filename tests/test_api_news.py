@@ -0,0 +1,34 @@
+import pytest
+
+import news_store
+from conftest import make_records
+
+
+@pytest.fixture(scope='module')
+def client():
+    import app
+
+    app.limiter.enabled = False
+    news_store.save_news_batch(make_records(12, [1_700_000_000 + index for index in range(12)], prefix='api',
+                                            country='Slovenia'))
+    return app.app.test_client()
+
+
+def test_pages_follow_next_cursor(client):
+    titles, cursor = [], None
+    while True:
+        query = {'country': 'Slovenia', 'limit': 5, 'fields': 'title'}
+        if cursor:
+            query['cursor'] = cursor
+        body = client.get('/api/news', query_string=query).get_json()
+        titles += [item['title'] for item in body['items']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert titles == [f'api {index}' for index in reversed(range(12))]
+
+
+@pytest.mark.parametrize('query', [{'cursor': 'garbage'}, {'until': '99999999999999999999'}, {'limit': 0},
+                                   {'fields': 'secret'}])
+def test_bad_arguments_are_rejected(client, query):
+    assert client.get('/api/news', query_string=query).status_code == 400
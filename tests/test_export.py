@@ -0,0 +1,33 @@
+import gzip
+import json
+
+import pytest
+
+import news_store
+from conftest import make_records
+
+
+@pytest.fixture(scope='module')
+def client():
+    import app
+
+    app.limiter.enabled = False
+    news_store.save_news_batch(make_records(3, prefix='export', country='Poland'))
+    return app.app.test_client()
+
+
+@pytest.mark.parametrize('accept, gzipped', [('gzip', True), ('br, gzip;q=0.5', True), ('*', True),
+                                             ('gzip;q=0', False), ('identity', False), (None, False)])
+def test_gzip_follows_accept_encoding(client, accept, gzipped):
+    headers = {'Accept-Encoding': accept} if accept else {}
+    response = client.get('/api/news/export?country=Poland', headers=headers)
+    assert response.status_code == 200
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert (response.headers.get('Content-Encoding') == 'gzip') is gzipped
+    body = gzip.decompress(response.data) if gzipped else response.data
+    assert [json.loads(line)['title'] for line in body.decode('utf-8').splitlines()] == [
+        'export 0', 'export 1', 'export 2']
+
+
+def test_after_out_of_range_is_rejected(client):
+    assert client.get('/api/news/export?after=99999999999999999999').status_code == 400
@@ -0,0 +1,100 @@
+from collections import Counter
+
+import pytest
+
+import feed_fetcher
+from benchmarks.fixtures import FeedServer
+from conftest import make_records
+
+
+@pytest.fixture
+def server():
+    server = FeedServer([make_records(5, prefix='a'), make_records(3, prefix='b')])
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def db(news_db):
+    feed_fetcher.init_validators(news_db)
+    return news_db
+
+
+def test_conditional_get_is_answered_304(server, db):
+    url = server.urls[0]
+    first = feed_fetcher.fetch_feed(url, feed_fetcher.load_validators(db).get(url))
+    assert first['status'] == 200 and first['error'] is None
+    assert len(first['feed'].entries) == 5
+    assert first['etag'] and first['last_modified']
+
+    feed_fetcher.save_validator(first, db)
+    validator = feed_fetcher.load_validators(db)[url]
+    assert validator == {'etag': first['etag'], 'last_modified': first['last_modified']}
+
+    second = feed_fetcher.fetch_feed(url, validator)
+    assert second['status'] == 304
+    assert second['feed'] is None and second['error'] is None
+    assert server.responses == Counter({200: 1, 304: 1})
+
+
+def test_changed_feed_is_fetched_again(server, db):
+    url = server.urls[0]
+    first = feed_fetcher.fetch_feed(url)
+    feed_fetcher.save_validator(first, db)
+
+    server.update(0, make_records(7, prefix='c'))
+    changed = feed_fetcher.fetch_feed(url, feed_fetcher.load_validators(db)[url])
+    assert changed['status'] == 200
+    assert len(changed['feed'].entries) == 7
+    assert changed['etag'] != first['etag']
+
+
+def test_if_modified_since_alone(server):
+    first = feed_fetcher.fetch_feed(server.urls[0])
+    result = feed_fetcher.fetch_feed(server.urls[0], {'etag': None, 'last_modified': first['last_modified']})
+    assert result['status'] == 304
+
+
+def test_only_fresh_validators_are_saved(server, db):
+    feed_fetcher.save_validator(feed_fetcher.fetch_feed(server.urls[0]), db)
+    # A 304 carries no new validators and an error none at all
+    feed_fetcher.save_validator({'url': server.urls[1], 'status': 304, 'etag': '"x"', 'last_modified': None},
+                                db)
+    feed_fetcher.save_validator(feed_fetcher.fetch_feed(server.urls[0].replace('/0.xml', '/9.xml')), db)
+    assert list(feed_fetcher.load_validators(db)) == [server.urls[0]]
+
+
+def test_fetch_feeds_sends_the_known_validators(server, db):
+    for result in feed_fetcher.fetch_feeds(server.urls):
+        feed_fetcher.save_validator(result, db)
+    server.update(1, make_records(4, prefix='d'))
+
+    results = {result['url']: result
+               for result in feed_fetcher.fetch_feeds(server.urls, feed_fetcher.load_validators(db))}
+    assert results[server.urls[0]]['status'] == 304
+    assert results[server.urls[1]]['status'] == 200
+    assert len(results[server.urls[1]]['feed'].entries) == 4
+
+
+def test_load_validator_reads_one_feed(server, db):
+    feed_fetcher.save_validator(feed_fetcher.fetch_feed(server.urls[0]), db)
+    assert feed_fetcher.load_validator(server.urls[0], db) == feed_fetcher.load_validators(db)[server.urls[0]]
+    assert feed_fetcher.load_validator(server.urls[1], db) is None
+
+
+def test_stored_rows_survive_a_validator_write_failure(monkeypatch):
+    import sqlite3
+
+    import ingest
+    import news_store
+
+    news_store.init_db()
+    ingest.near_duplicates.init_index()
+
+    def locked(result, db_path=None):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(feed_fetcher, 'save_validator', locked)
+    result = {'url': 'https://example.com/feed', 'status': 200, 'etag': '"x"', 'last_modified': None}
+    stats = ingest.store_articles([(result, make_records(2, prefix='validator-failure'))])
+    assert stats['inserted'] == 2
@@ -0,0 +1,99 @@
+import pytest
+
+import feed_registry
+
+
+@pytest.fixture
+def registry_db(news_db):
+    feed_registry.init_registry(news_db)
+    return news_db
+
+
+def fetch_result(url, error=None):
+    return {'url': url, 'status': None if error else 200, 'elapsed': 0.1, 'error': error, 'feed': None}
+
+
+def feed(db, url):
+    return next(row for row in feed_registry.list_feeds(db) if row['url'] == url)
+
+
+def test_failing_feed_is_backed_off_until_it_succeeds(registry_db):
+    url = 'https://example.com/flaky'
+    feed_id = feed_registry.add_feed(url, 'Hungary', db_path=registry_db)
+    for _ in range(feed_registry.BACKOFF_AFTER - 1):
+        feed_registry.record_fetch(fetch_result(url, 'timeout'), registry_db)
+    assert feed(registry_db, url)['backoff_until'] is None
+
+    feed_registry.record_fetch(fetch_result(url, 'timeout'), registry_db)
+    assert feed(registry_db, url)['error_streak'] == feed_registry.BACKOFF_AFTER
+    assert url not in feed_registry.load_feeds(registry_db).get('Hungary', [])
+
+    # Re-enabling clears the backoff, and so does one successful fetch
+    assert feed_registry.update_feed(feed_id, {'enabled': True}, db_path=registry_db)
+    assert url in feed_registry.load_feeds(registry_db)['Hungary']
+    feed_registry.record_fetch(fetch_result(url), registry_db)
+    assert feed(registry_db, url)['error_streak'] == 0
+
+
+def test_backoff_grows_exponentially_up_to_the_cap():
+    after = feed_registry.BACKOFF_AFTER
+    assert feed_registry.backoff_delay(after - 1) is None
+    assert feed_registry.backoff_delay(after + 1) == 2 * feed_registry.backoff_delay(after)
+    assert feed_registry.backoff_delay(after + 100) == feed_registry.BACKOFF_MAX
+
+
+@pytest.mark.parametrize('changes', [{'db_path': '/tmp/other.db'}, {'url': ''}, {'country': 5},
+                                     {'enabled': 'yes'}, ['enabled']])
+def test_update_feed_rejects_invalid_changes(registry_db, changes):
+    with pytest.raises(ValueError):
+        feed_registry.update_feed(1, changes, db_path=registry_db)
+
+
+@pytest.fixture(scope='module')
+def client():
+    import app
+
+    app.limiter.enabled = False
+    return app.app.test_client()
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    return {'Authorization': 'Bearer secret'}
+
+
+@pytest.mark.parametrize('headers', [{}, {'Authorization': 'Bearer wrong'}, {'Authorization': 'Bearer secre'},
+                                     {'Authorization': 'secret'}])
+def test_admin_routes_need_the_token(client, admin, headers):
+    assert client.get('/api/admin/feeds', headers=headers).status_code == 403
+
+
+def test_admin_routes_are_off_without_a_token(client, monkeypatch):
+    monkeypatch.delenv('ADMIN_TOKEN', raising=False)
+    assert client.get('/api/admin/feeds', headers={'Authorization': 'Bearer '}).status_code == 403
+
+
+def test_admin_feed_lifecycle(client, admin):
+    response = client.post('/api/admin/feeds', json={'url': 'https://example.com/admin', 'country': 'Serbia'},
+                           headers=admin)
+    assert response.status_code == 201
+    feed_id = response.get_json()['id']
+    assert client.post('/api/admin/feeds', json={'url': 'https://example.com/admin', 'country': 'Serbia'},
+                       headers=admin).status_code == 409
+
+    assert client.patch(f'/api/admin/feeds/{feed_id}', json={'enabled': False}, headers=admin).status_code == 204
+    assert client.patch(f'/api/admin/feeds/{feed_id}', json={'url': feed_registry.SEED_FEEDS['Serbia'][0]},
+                        headers=admin).status_code == 409
+    assert client.delete(f'/api/admin/feeds/{feed_id}', headers=admin).status_code == 204
+    assert client.delete(f'/api/admin/feeds/{feed_id}', headers=admin).status_code == 404
+
+
+@pytest.mark.parametrize('method, path, body', [
+    ('post', '/api/admin/feeds', [1]),
+    ('post', '/api/admin/feeds', {'url': 5, 'country': 'Serbia'}),
+    ('patch', '/api/admin/feeds/1', ['enabled']),
+    ('patch', '/api/admin/feeds/1', {'db_path': '/tmp/other.db'}),
+])
+def test_admin_routes_reject_invalid_bodies(client, admin, method, path, body):
+    assert getattr(client, method)(path, json=body, headers=admin).status_code == 400
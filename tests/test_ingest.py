@@ -0,0 +1,30 @@
+import feedparser
+import pytest
+
+import ingest
+import news_store
+from benchmarks.fixtures import feed_xml
+from conftest import make_records
+
+
+@pytest.fixture
+def hungarian_feed(monkeypatch):
+    news_store.init_db()
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    monkeypatch.setattr(ingest, '_translator', None)
+    monkeypatch.setattr(ingest.language, 'title_languages', lambda url, titles, db_path=None: ['hu'] * len(titles))
+    records = make_records(3, prefix='magyar')
+    return {'url': 'https://example.hu/rss', 'feed': feedparser.parse(feed_xml(records))}
+
+
+def test_same_language_feed_needs_no_translation_backend(hungarian_feed):
+    articles, entries, skipped, avoided = ingest.prepare_feed_articles(hungarian_feed, 'Hungary', set())
+    assert [article['title'] for article in articles] == ['magyar 0', 'magyar 1', 'magyar 2']
+    assert (entries, skipped, avoided) == (3, 0, 3)
+    assert ingest._translator is None
+
+
+def test_foreign_titles_still_need_the_backend(hungarian_feed, monkeypatch):
+    monkeypatch.setattr(ingest.language, 'title_languages', lambda url, titles, db_path=None: ['sr'] * len(titles))
+    with pytest.raises(ValueError, match='OPENAI_API_KEY'):
+        ingest.prepare_feed_articles(hungarian_feed, 'Serbia', set())
@@ -0,0 +1,102 @@
+import sqlite3
+import time
+
+import pytest
+
+import job_queue
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = job_queue.connect(str(tmp_path / 'jobs.db'))
+    yield conn
+    conn.close()
+
+
+def status(conn, job_id):
+    return conn.execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()[0]
+
+
+def test_lease_hands_out_each_job_once(conn, tmp_path):
+    first = job_queue.enqueue(conn, 'ingest_feed', {'url': 'a'})
+    second = job_queue.enqueue(conn, 'ingest_feed', {'url': 'b'})
+    other = job_queue.connect(str(tmp_path / 'jobs.db'))
+    try:
+        leased = [job_queue.lease(conn, 'w1'), job_queue.lease(other, 'w2')]
+    finally:
+        other.close()
+    assert sorted(job[0] for job in leased) == [first, second]
+    assert job_queue.lease(conn, 'w1') is None
+    assert leased[0][2] in ({'url': 'a'}, {'url': 'b'}) and leased[0][3] == 1
+
+
+def test_unique_key_is_queued_at_most_once(conn):
+    assert job_queue.enqueue(conn, 'update_derived', {}, unique_key='derived') is not None
+    assert job_queue.enqueue(conn, 'update_derived', {}, unique_key='derived') is None
+    assert job_queue.depth(conn) == {'queued': 1}
+
+
+def test_job_enqueued_while_its_twin_runs_waits_for_it(conn):
+    running = job_queue.enqueue(conn, 'update_derived', {}, unique_key='derived')
+    assert job_queue.lease(conn, 'w1')[0] == running
+    waiting = job_queue.enqueue(conn, 'update_derived', {}, unique_key='derived')
+    assert waiting is not None
+    assert job_queue.lease(conn, 'w2') is None
+
+    job_queue.complete(conn, running)
+    assert job_queue.lease(conn, 'w2')[0] == waiting
+
+
+def test_failed_job_is_retried_with_backoff_then_given_up(conn):
+    job_id = job_queue.enqueue(conn, 'ingest_feed', {})
+    _, _, _, attempts = job_queue.lease(conn, 'w1')
+    job_queue.fail(conn, job_id, attempts, 'boom', max_attempts=2)
+    run_after, last_error = conn.execute('SELECT run_after, last_error FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    assert status(conn, job_id) == 'queued' and last_error == 'boom'
+    assert run_after > time.time() + job_queue.BACKOFF_BASE * 0.8
+    assert job_queue.lease(conn, 'w1') is None  # still backing off
+
+    with conn:
+        conn.execute('UPDATE jobs SET run_after = 0 WHERE id = ?', (job_id,))
+    _, _, _, attempts = job_queue.lease(conn, 'w1')
+    assert attempts == 2
+    job_queue.fail(conn, job_id, attempts, 'boom', max_attempts=2)
+    assert status(conn, job_id) == 'failed'
+
+
+def test_expired_lease_is_retaken_until_max_attempts(conn):
+    job_id = job_queue.enqueue(conn, 'ingest_feed', {})
+    assert job_queue.lease(conn, 'w1', lease_seconds=-1, max_attempts=2)[3] == 1
+    # The worker died: the expired lease is handed out again
+    assert job_queue.lease(conn, 'w2', lease_seconds=-1, max_attempts=2)[3] == 2
+    assert job_queue.lease(conn, 'w3', lease_seconds=-1, max_attempts=2) is None
+    assert status(conn, job_id) == 'failed'
+
+
+def test_leadership_moves_only_after_the_lease_expires(conn):
+    assert job_queue.acquire_leadership(conn, 'scheduler', 'a', ttl=60)
+    assert not job_queue.acquire_leadership(conn, 'scheduler', 'b', ttl=60)
+    assert job_queue.acquire_leadership(conn, 'scheduler', 'a', ttl=-1)
+    assert job_queue.acquire_leadership(conn, 'scheduler', 'b', ttl=60)
+
+
+def test_readonly_connection_reads_depth_without_writing(conn, tmp_path):
+    job_queue.enqueue(conn, 'ingest_feed', {})
+    reader = job_queue.connect_readonly(str(tmp_path / 'jobs.db'))
+    try:
+        assert job_queue.depth(reader) == {'queued': 1}
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute("DELETE FROM jobs")
+    finally:
+        reader.close()
+
+
+def test_metrics_scrape_does_not_create_the_queue(tmp_path, monkeypatch):
+    import app
+
+    path = tmp_path / 'missing.db'
+    monkeypatch.setattr(job_queue, 'JOB_QUEUE_PATH', str(path))
+    response = app.app.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert 'job_queue_depth{status="queued"} 0' in response.get_data(as_text=True)
+    assert not path.exists()
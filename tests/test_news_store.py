@@ -0,0 +1,73 @@
+import pytest
+
+import news_store
+from conftest import make_records
+
+
+def all_pages(db, **query):
+    pages, cursor = [], None
+    while True:
+        items, cursor = news_store.query_news(cursor=cursor, db_path=db, fields=('id', 'published_ts'), **query)
+        pages.append(items)
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_every_row_once_newest_first(news_db):
+    # Repeated timestamps make id the tie-breaker inside a page and across page boundaries
+    stamps = [1_700_000_000 + (index // 4) * 60 for index in range(25)]
+    assert news_store.save_news_batch(make_records(25, stamps), news_db)['inserted'] == 25
+
+    pages = all_pages(news_db, limit=10)
+    assert [len(page) for page in pages] == [10, 10, 5]
+    rows = [(item['published_ts'], item['id']) for page in pages for item in page]
+    assert rows == sorted(rows, reverse=True)
+    assert len(set(rows)) == 25
+
+
+def test_exact_multiple_of_the_page_size_ends_without_an_empty_page(news_db):
+    news_store.save_news_batch(make_records(20), news_db)
+    assert [len(page) for page in all_pages(news_db, limit=10)] == [10, 10]
+
+
+def test_newer_rows_do_not_shift_later_pages(news_db):
+    news_store.save_news_batch(make_records(15, [1_700_000_000 + index for index in range(15)]), news_db)
+    first, cursor = news_store.query_news(limit=5, fields=('id',), db_path=news_db)
+    news_store.save_news_batch(make_records(5, 1_800_000_000, prefix='newer'), news_db)
+    second, _ = news_store.query_news(limit=5, cursor=cursor, fields=('id',), db_path=news_db)
+    assert [item['id'] for item in second] == [item['id'] - 5 for item in first]
+
+
+def test_cursor_respects_the_filters(news_db):
+    news_store.save_news_batch(make_records(6, country='Hungary'), news_db)
+    news_store.save_news_batch(make_records(6, prefix='other', country='Austria'), news_db)
+    pages = all_pages(news_db, limit=4, country='Austria')
+    assert sum(map(len, pages)) == 6
+
+
+@pytest.mark.parametrize('token', ['not-a-cursor', news_store.encode_cursor(2 ** 63, 1),
+                                   news_store.encode_cursor(1, -2 ** 63 - 1)])
+def test_invalid_cursor_is_rejected(news_db, token):
+    with pytest.raises(ValueError):
+        news_store.query_news(cursor=token, db_path=news_db)
+
+
+def test_save_bumps_the_data_version_only_on_insert(news_db):
+    before = news_store.data_version(news_db)
+    news_store.save_news_batch(make_records(3), news_db)
+    after = news_store.data_version(news_db)
+    news_store.save_news_batch(make_records(3), news_db)  # every link is already stored
+    assert after == before + 1
+    assert news_store.data_version(news_db) == after
+
+
+def test_save_counts_only_the_inserted_rows(news_db):
+    import aggregates
+    import search_index
+
+    # The rollup and full-text triggers write rows of their own on every insert
+    aggregates.init_rollups(news_db)
+    search_index.init_search(news_db)
+    assert news_store.save_news_batch(make_records(4), news_db) == {'inserted': 4, 'ignored': 0}
+    assert news_store.save_news_batch(make_records(6), news_db) == {'inserted': 2, 'ignored': 4}
+    assert aggregates.count_by('political_bias', db_path=news_db) == {'left': 6}
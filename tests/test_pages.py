@@ -0,0 +1,68 @@
+import pytest
+
+import news_store
+from conftest import make_records
+
+
+@pytest.fixture(scope='module')
+def client():
+    import app
+
+    app.limiter.enabled = False
+    news_store.save_news_batch(make_records(3, prefix='page', country='Slovakia'))
+    return app.app.test_client()
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    return {'Authorization': 'Bearer secret'}
+
+
+def test_repeat_view_with_the_etag_is_not_modified(client):
+    first = client.get('/news?country=Slovakia')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+
+    repeat = client.get('/news?country=Slovakia', headers={'If-None-Match': etag})
+    assert repeat.status_code == 304
+    assert repeat.data == b''
+    assert repeat.headers['ETag'] == etag
+    assert client.get('/news?country=Hungary').headers['ETag'] != etag
+
+
+def test_a_write_from_another_process_changes_the_etag(client):
+    etag = client.get('/news?country=Slovakia').headers['ETag']
+    # The data version lives in news.db, so a bump by any ingest process reaches this one
+    news_store.bump_data_version()
+    response = client.get('/news?country=Slovakia', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_settings_post_requires_the_admin_token(client, monkeypatch):
+    import user_settings
+
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    before = user_settings.load_settings()
+    assert client.post('/settings', data={'country': 'Poland'}).status_code == 403
+    assert client.post('/settings', data={'country': 'Poland'},
+                       headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    monkeypatch.delenv('ADMIN_TOKEN')
+    assert client.post('/settings', data={'country': 'Poland'},
+                       headers={'Authorization': 'Bearer '}).status_code == 403
+    assert user_settings.load_settings() == before
+
+
+@pytest.mark.parametrize('country', ['', 'Atlantis', '<script>'])
+def test_settings_post_rejects_unknown_countries(client, admin, country):
+    assert client.post('/settings', data={'country': country}, headers=admin).status_code == 400
+
+
+def test_settings_post_saves_a_registry_country(client, admin):
+    import user_settings
+
+    response = client.post('/settings', data={'country': 'Poland'}, headers=admin)
+    assert response.status_code == 302
+    assert user_settings.load_settings() == 'Poland'
@@ -0,0 +1,59 @@
+import pytest
+
+import news_store
+import search_index
+from conftest import make_records
+
+
+@pytest.fixture
+def search_db(news_db):
+    search_index.init_search(news_db)
+    return news_db
+
+
+def store_titles(db, titles):
+    records = make_records(len(titles), prefix='search')
+    for record, title in zip(records, titles):
+        record['title'] = title
+    news_store.save_news_batch(records, db)
+
+
+def test_snippet_escapes_the_title_and_marks_the_match(search_db):
+    store_titles(search_db, ['<script>alert(1)</script> budget & "taxes"'])
+    [item] = search_index.search('budget', db_path=search_db)
+    assert '<script>' not in item['snippet']
+    assert item['snippet'].startswith('&lt;script&gt;alert(1)&lt;/script&gt; <mark>budget</mark> &amp;')
+    assert item['snippet'].count('<mark>') == 1
+
+
+def test_pages_do_not_overlap(search_db):
+    store_titles(search_db, [f'election result {index}' for index in range(5)])
+    pages = [search_index.search('election', limit=2, page=page, db_path=search_db) for page in (1, 2, 3)]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert len({item['id'] for page in pages for item in page}) == 5
+
+
+@pytest.mark.parametrize('page, limit', [(0, 20), (search_index.MAX_RESULTS // 20 + 1, 20), (10 ** 21, 20)])
+def test_deep_pages_are_rejected(search_db, page, limit):
+    with pytest.raises(ValueError):
+        search_index.search('election', limit=limit, page=page, db_path=search_db)
+
+
+@pytest.fixture(scope='module')
+def client():
+    import app
+
+    app.limiter.enabled = False
+    return app.app.test_client()
+
+
+@pytest.mark.parametrize('query', ['q=alpha&page=999999999999999999999', 'q=alpha&page=501&limit=20',
+                                   'q=alpha&page=0', 'q=alpha&limit=101'])
+def test_api_search_rejects_unreachable_pages(client, query):
+    assert client.get(f'/api/search?{query}').status_code == 400
+
+
+def test_api_search_last_reachable_page_has_no_next(client):
+    response = client.get('/api/search?q=alpha&page=500&limit=20')
+    assert response.status_code == 200
+    assert response.get_json()['next_page'] is None
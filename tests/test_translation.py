@@ -0,0 +1,33 @@
+import time
+
+from translation import BatchTranslator, FakeBackend, TranslationCache
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = TranslationCache(str(tmp_path / 'cache.db'), max_entries=3)
+    for text in ('a', 'b', 'c'):
+        cache.put_many({text: text.upper()}, 'hu')
+        time.sleep(0.01)
+    assert cache.get_many(['a'], 'hu') == {'a': 'A'}  # refreshes a's stamp past b and c
+    time.sleep(0.01)
+
+    cache.put_many({'d': 'D'}, 'hu')
+    assert len(cache) == 3
+    assert cache.get_many(['a', 'b', 'c', 'd'], 'hu') == {'a': 'A', 'c': 'C', 'd': 'D'}
+
+
+def test_cache_is_keyed_by_target_language(tmp_path):
+    cache = TranslationCache(str(tmp_path / 'cache.db'))
+    cache.put_many({'text': 'szöveg'}, 'hu')
+    assert cache.get_many(['text'], 'de') == {}
+
+
+def test_translator_deduplicates_and_reuses_the_cache(tmp_path):
+    backend = FakeBackend(batch_size=2)
+    translator = BatchTranslator(backend, TranslationCache(str(tmp_path / 'cache.db')))
+    assert translator.translate(['x', 'y', 'x', 'z', '']) == ['[hu] x', '[hu] y', '[hu] x', '[hu] z', '']
+    assert (backend.requests, backend.texts) == (2, 3)
+
+    assert translator.translate(['y', 'z']) == ['[hu] y', '[hu] z']
+    assert backend.texts == 3
+    assert translator.stats['cache_hits'] == 2
@@ -0,0 +1,37 @@
+import json
+import os
+
+import pytest
+
+import user_settings
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'settings.json')
+
+
+def test_missing_or_invalid_file_gives_the_default(path):
+    assert user_settings.load_settings(path) == user_settings.DEFAULT_COUNTRY
+    with open(path, 'w') as f:
+        f.write('{not json')
+    assert user_settings.load_settings(path) == user_settings.DEFAULT_COUNTRY
+
+
+def test_saved_country_is_served_from_memory(path, monkeypatch):
+    user_settings.save_settings('Austria', path)
+    monkeypatch.setattr(user_settings, 'open', lambda *args, **kwargs: pytest.fail('file was re-read'),
+                        raising=False)
+    assert user_settings.load_settings(path) == 'Austria'
+
+
+def test_change_by_another_process_is_picked_up(path, monkeypatch):
+    user_settings.save_settings('Austria', path)
+    with open(path, 'w') as f:
+        json.dump({'country': 'Romania'}, f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    # Within CHECK_INTERVAL the remembered value is still served
+    assert user_settings.load_settings(path) == 'Austria'
+    monkeypatch.setattr(user_settings, 'CHECK_INTERVAL', 0)
+    assert user_settings.load_settings(path) == 'Romania'
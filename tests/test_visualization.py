@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+import news_store
+from conftest import make_records
+
+DAY = 86400
+BASE = 1_700_006_400  # midnight UTC
+
+
+@pytest.fixture(scope='module')
+def client():
+    import app
+
+    app.limiter.enabled = False
+    news_store.save_news_batch(make_records(4, [BASE + hour * 3600 for hour in range(4)], prefix='viz',
+                                            country='Romania'))
+    return app.app.test_client()
+
+
+def test_day_window_widens_to_whole_days():
+    import app
+
+    assert app.day_window(BASE + 5, BASE + DAY + 5) == (BASE, BASE + 2 * DAY)
+    assert app.day_window(BASE, None) == (BASE, None)
+
+
+def test_times_within_one_day_share_one_cached_figure(client, monkeypatch):
+    import app
+
+    stored = {}
+    monkeypatch.setattr(app.response_cache, 'set', lambda key, value: stored.__setitem__(key, value))
+    monkeypatch.setattr(app.response_cache, 'get', stored.get)
+    for offset in (0, 60, 3600, 7200, 80000):
+        response = client.get(f'/visualization?country=Romania&since={BASE + offset}')
+        assert response.status_code == 200
+    assert len(stored) == 1
+
+    div, = stored.values()
+    # plotly.js is loaded from the CDN by the template, not embedded in every figure
+    assert len(div) < 50_000 and 'cdn.plot.ly' in response.get_data(as_text=True)
+    assert not os.path.exists(os.path.join('static', 'graphs'))
+
+
+def test_empty_window_has_no_figure(client):
+    response = client.get(f'/visualization?country=Romania&since={BASE + 2 * DAY}')
+    assert response.get_data(as_text=True) == "No data available for visualization."
@@ -0,0 +1,112 @@
+"""Incremental topic clustering of news titles.
+
+Titles are vectorized with a hashing TF-IDF whose document frequencies are updated
+online, and clustered with MiniBatchKMeans.partial_fit. Each ingest run folds in only
+the titles that have no topic_cluster yet; the model is pickled between runs.
+"""
+import logging
+import os
+import pickle
+
+import numpy as np
+
+import news_store
+
+TOPIC_MODEL_PATH = os.getenv('TOPIC_MODEL_PATH', 'topic_model.pkl')
+NUM_CLUSTERS = 3
+N_FEATURES = 2 ** 18
+UPDATE_BATCH_SIZE = 5000
+
+
+class TopicModel:
+    def __init__(self, num_clusters=NUM_CLUSTERS, n_features=N_FEATURES, random_state=42):
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        # Hashing needs no vocabulary, so new words never force a refit
+        self.vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None,
+                                            stop_words='english')
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.num_docs = 0
+        self.kmeans = MiniBatchKMeans(n_clusters=num_clusters, random_state=random_state, n_init=3)
+        self.num_clusters = num_clusters
+
+    def _tfidf(self, counts):
+        from sklearn.preprocessing import normalize
+
+        # Same smoothed idf as TfidfVectorizer, computed from the running document frequencies
+        idf = np.log((1 + self.num_docs) / (1 + self.doc_freq)) + 1
+        return normalize(counts.multiply(idf).tocsr())
+
+    def transform(self, titles):
+        return self._tfidf(self.vectorizer.transform(titles))
+
+    def partial_fit(self, titles):
+        """Fold new titles into the document frequencies and the centroids; return their labels."""
+        if len(titles) < self.num_clusters and not hasattr(self.kmeans, 'cluster_centers_'):
+            return None  # the first batch must have at least one title per cluster
+        counts = self.vectorizer.transform(titles)
+        self.doc_freq += np.asarray((counts > 0).sum(axis=0)).ravel()
+        self.num_docs += counts.shape[0]
+        X = self._tfidf(counts)
+        self.kmeans.partial_fit(X)
+        return self.kmeans.predict(X)
+
+    def predict(self, titles):
+        return self.kmeans.predict(self.transform(titles))
+
+
+def load_model(path=None):
+    path = path or TOPIC_MODEL_PATH
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    return TopicModel()
+
+
+def save_model(model, path=None):
+    path = path or TOPIC_MODEL_PATH
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def update_clusters(batch_size=UPDATE_BATCH_SIZE, db_path=None, model_path=None):
+    """Cluster the titles stored since the last update and save their topic_cluster.
+
+    Returns the number of newly labelled articles.
+    """
+    model = load_model(model_path)
+    conn = news_store.get_connection(db_path)
+    last_id = labelled = seen = 0
+    while True:
+        rows = conn.execute('''SELECT id, title FROM news WHERE id > ? AND topic_cluster IS NULL AND title IS NOT NULL
+                               ORDER BY id LIMIT ?''', (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        seen += len(rows)
+        labels = model.partial_fit([title for _, title in rows])
+        if labels is None:
+            continue  # labelled on a later run, once enough titles exist
+        with conn:
+            conn.executemany('UPDATE news SET topic_cluster = ? WHERE id = ?',
+                             [(int(label), row_id) for (row_id, _), label in zip(rows, labels)])
+        labelled += len(rows)
+    if seen:
+        save_model(model, model_path)
+    if labelled:
+        logging.info(f"Topic clustering: labelled {labelled} new articles")
+    return labelled
+
+
+def load_clusters(db_path=None, limit=None):
+    """Return (titles, labels) of every clustered article (or the newest limit of them), in id order."""
+    query = 'SELECT title, topic_cluster FROM news WHERE topic_cluster IS NOT NULL ORDER BY id DESC'
+    params = ()
+    if limit is not None:
+        query += ' LIMIT ?'
+        params = (limit,)
+    rows = news_store.get_connection(db_path).execute(query, params).fetchall()[::-1]
+    return [title for title, _ in rows], [label for _, label in rows]
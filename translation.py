@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TRANSLATION_CACHE_PATH = os.getenv('TRANSLATION_CACHE_PATH', 'translation_cache.db')
+MAX_CACHE_ENTRIES = 200_000
+MAX_CONCURRENT_REQUESTS = 4
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+# Translation backends
+class TranslationBackend:
+    """Translates a batch of texts in as few remote calls as possible.
+
+    translate_batch returns one item per input; None marks a text that could not
+    be translated, which is then neither cached nor retried within the run.
+    source_language is a hint (None when unknown) that a backend may ignore.
+    """
+    batch_size = 20
+
+    def translate_batch(self, texts, target_language, source_language=None):
+        raise NotImplementedError
+
+
+class OpenAIBackend(TranslationBackend):
+    """Packs a batch of titles into one numbered completion prompt."""
+    batch_size = 20
+    _line_re = re.compile(r'^\s*(\d+)[.)]\s*(.*)$')
+
+    def __init__(self, model="text-davinci-003", max_tokens_per_text=100, api_key=None):
+        self.model = model
+        self.max_tokens_per_text = max_tokens_per_text
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        if not self.api_key:
+            raise ValueError("API key for OpenAI is not set. Please set the OPENAI_API_KEY environment variable.")
+
+    def translate_batch(self, texts, target_language, source_language=None):
+        import openai
+
+        openai.api_key = self.api_key
+        numbered = "\n".join(f"{i}. {' '.join(text.split())}" for i, text in enumerate(texts, 1))
+        source = f" from {source_language}" if source_language else ""
+        response = openai.Completion.create(
+            model=self.model,
+            prompt=(f"Translate each of the following numbered lines{source} to {target_language}. "
+                    f"Answer with the same numbering, one line per item:\n{numbered}\n"),
+            max_tokens=self.max_tokens_per_text * len(texts)
+        )
+        translated = [None] * len(texts)
+        for line in response.choices[0].text.splitlines():
+            match = self._line_re.match(line)
+            if match and 0 < int(match.group(1)) <= len(texts) and match.group(2).strip():
+                translated[int(match.group(1)) - 1] = match.group(2).strip()
+        return translated
+
+
+class GoogleBackend(TranslationBackend):
+    """googletrans accepts a list and translates it in one session."""
+    batch_size = 50
+
+    def __init__(self):
+        from googletrans import Translator
+        self.translator = Translator()
+
+    def translate_batch(self, texts, target_language, source_language=None):
+        # Google's own detection tells close languages (e.g. Serbian and Macedonian) apart better than ours
+        return [item.text for item in self.translator.translate(list(texts), dest=target_language)]
+
+
+class FakeBackend(TranslationBackend):
+    """Local stand-in for tests and benchmarks: tags each text, optionally sleeping per request."""
+
+    def __init__(self, latency=0.0, batch_size=20):
+        self.latency = latency
+        self.batch_size = batch_size
+        self.requests = 0
+        self.texts = 0
+
+    def translate_batch(self, texts, target_language, source_language=None):
+        if self.latency:
+            time.sleep(self.latency)
+        self.requests += 1
+        self.texts += len(texts)
+        return [f"[{target_language}] {text}" for text in texts]
+
+
+# Persistent translation cache keyed by (source text hash, target language)
+class TranslationCache:
+    def __init__(self, path=TRANSLATION_CACHE_PATH, max_entries=MAX_CACHE_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        with sqlite3.connect(self.path) as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS translation_cache
+                            (text_hash TEXT, target_language TEXT, translated TEXT, last_used REAL,
+                             PRIMARY KEY (text_hash, target_language))''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_translation_last_used ON translation_cache (last_used)')
+
+    def get_many(self, texts, target_language):
+        """Return {text: translation} for the cached texts and refresh their LRU stamp."""
+        hashes = {text_hash(text): text for text in texts}
+        found = {}
+        with sqlite3.connect(self.path) as conn:
+            keys = list(hashes)
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = conn.execute(
+                    f'''SELECT text_hash, translated FROM translation_cache
+                        WHERE target_language = ? AND text_hash IN ({','.join('?' * len(chunk))})''',
+                    [target_language, *chunk]).fetchall()
+                for key, translated in rows:
+                    found[hashes[key]] = translated
+            if found:
+                now = time.time()
+                conn.executemany('UPDATE translation_cache SET last_used = ? WHERE text_hash = ? AND target_language = ?',
+                                 [(now, text_hash(text), target_language) for text in found])
+        return found
+
+    def put_many(self, translations, target_language):
+        if not translations:
+            return
+        now = time.time()
+        with sqlite3.connect(self.path) as conn:
+            conn.executemany('INSERT OR REPLACE INTO translation_cache VALUES (?, ?, ?, ?)',
+                             [(text_hash(text), target_language, translated, now)
+                              for text, translated in translations.items()])
+            self._evict(conn)
+
+    def _evict(self, conn):
+        (count,) = conn.execute('SELECT COUNT(*) FROM translation_cache').fetchone()
+        if count > self.max_entries:
+            conn.execute('''DELETE FROM translation_cache WHERE rowid IN
+                            (SELECT rowid FROM translation_cache ORDER BY last_used LIMIT ?)''',
+                         (count - self.max_entries,))
+
+    def __len__(self):
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute('SELECT COUNT(*) FROM translation_cache').fetchone()[0]
+
+
+class BatchTranslator:
+    """Translates lists of texts through a cache, deduplicating and batching the misses."""
+
+    def __init__(self, backend, cache=None, batch_size=None, max_concurrency=MAX_CONCURRENT_REQUESTS):
+        self.backend = backend
+        self.cache = cache if cache is not None else TranslationCache()
+        self.batch_size = batch_size or backend.batch_size
+        self.max_concurrency = max_concurrency
+        self.stats = {'requested': 0, 'cache_hits': 0, 'translated': 0, 'failed': 0, 'backend_requests': 0}
+
+    def _translate_chunk(self, chunk, target_language, source_language=None):
+        try:
+            translated = self.backend.translate_batch(chunk, target_language, source_language)
+        except Exception as e:
+            logging.error(f"Translation batch of {len(chunk)} texts failed, error: {e}")
+            translated = [None] * len(chunk)
+        return chunk, translated
+
+    def translate(self, texts, target_language='hu', source_language=None):
+        """Translate texts, returning the original text wherever translation failed."""
+        texts = list(texts)
+        self.stats['requested'] += len(texts)
+        unique = [text for text in dict.fromkeys(texts) if text and text.strip()]
+        results = self.cache.get_many(unique, target_language)
+        self.stats['cache_hits'] += sum(1 for text in texts if text in results)
+
+        missing = [text for text in unique if text not in results]
+        chunks = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        fresh = {}
+        if chunks:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(chunks))) as executor:
+                results_by_chunk = executor.map(self._translate_chunk, chunks, [target_language] * len(chunks),
+                                                [source_language] * len(chunks))
+                for chunk, translated in results_by_chunk:
+                    self.stats['backend_requests'] += 1
+                    for text, translation in zip(chunk, translated):
+                        if translation:
+                            fresh[text] = translation
+                        else:
+                            self.stats['failed'] += 1
+            self.cache.put_many(fresh, target_language)
+            self.stats['translated'] += len(fresh)
+        results.update(fresh)
+        return [results.get(text, text) for text in texts]
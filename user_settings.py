@@ -1,22 +1,69 @@
 import json
-import os  # Importáld az os modult
-
-def save_settings(selected_country):
-    """Mentés: kiválasztott ország elmentése a JSON fájlba."""
-    settings = {"country": selected_country}
-    with open('user_settings.json', 'w') as f:
-        json.dump(settings, f)
-
-def load_settings():
-    """Betöltés: a kiválasztott ország visszaadása a JSON fájlból."""
-    file_path = 'user_settings.json'
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, 'r') as f:
-                settings = json.load(f)
-                return settings.get("country", "Hungary")  # Alapértelmezett érték
-        except Exception as e:
-            print(f"Hiba a fájl beolvasásakor: {e}")
-    else:
-        print(f"A '{file_path}' fájl NEM létezik.")
-        return "Hungary"  # Alapértelmezett érték
+import logging
+import os
+import threading
+import time
+
+SETTINGS_PATH = os.getenv('USER_SETTINGS_PATH', 'user_settings.json')
+DEFAULT_COUNTRY = 'Hungary'
+CHECK_INTERVAL = 1.0  # másodperc két módosításiidő-ellenőrzés között
+
+_lock = threading.Lock()
+_cached = None  # (útvonal, mtime_ns, méret, ország)
+_checked_at = 0.0
+
+
+def _remember(path, country):
+    global _cached, _checked_at
+    stat = os.stat(path)
+    with _lock:
+        _cached = (path, stat.st_mtime_ns, stat.st_size, country)
+        _checked_at = time.monotonic()
+
+
+def save_settings(selected_country, path=None):
+    """Mentés: kiválasztott ország elmentése a JSON fájlba és a memóriában tartott másolatba."""
+    path = path or SETTINGS_PATH
+    # Ideiglenes fájlba írunk és cserélünk, így olvasó sosem lát félig írt fájlt
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({"country": selected_country}, f)
+    os.replace(tmp_path, path)
+    _remember(path, selected_country)
+
+
+def load_settings(path=None):
+    """Betöltés: a kiválasztott ország a memóriából; a fájlt csak akkor olvassuk újra, ha megváltozott.
+
+    Legfeljebb CHECK_INTERVAL másodpercenként nézzük meg a fájl módosítási idejét, így egy
+    másik folyamat mentése is hamar látszik. Hiányzó, üres vagy hibás fájlnál az
+    alapértelmezett országot adjuk vissza.
+    """
+    global _cached, _checked_at
+    path = path or SETTINGS_PATH
+    now = time.monotonic()
+    with _lock:
+        if _cached and _cached[0] == path and now - _checked_at < CHECK_INTERVAL:
+            return _cached[3]
+    try:
+        stat = os.stat(path)
+    except OSError:
+        with _lock:
+            _cached, _checked_at = None, now
+        return DEFAULT_COUNTRY
+    with _lock:
+        if _cached and _cached[:3] == (path, stat.st_mtime_ns, stat.st_size):
+            _checked_at = now
+            return _cached[3]
+
+    country = DEFAULT_COUNTRY
+    try:
+        with open(path, 'r') as f:
+            settings = json.load(f)
+        if isinstance(settings, dict) and settings.get("country"):
+            country = settings["country"]
+    except (OSError, ValueError) as e:
+        logging.error(f"Hiba a fájl beolvasásakor: {e}")
+    with _lock:
+        _cached, _checked_at = (path, stat.st_mtime_ns, stat.st_size, country), now
+    return country
@@ -7,16 +7,15 @@ import requests
 import os
 import sqlite3
 from dotenv import load_dotenv
-from flask import Flask, render_template, request
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
+from flask import Flask, render_template, request, send_from_directory
 import plotly.graph_objs as go
 from deep_translator import GoogleTranslator
-import matplotlib.pyplot as plt
-from matplotlib import cm
-from sklearn.metrics.pairwise import cosine_similarity
 import plotly
-import networkx as nx
+import numpy as np
+import analytics_snapshot
+import news_store
+import social_graph
+import topic_clustering
 
 # Flask alkalmazás inicializálása
 app = Flask(__name__, static_folder='static', static_url_path='')
@@ -34,6 +33,9 @@ CLUSTER_COLORS = [
     'rgb(156, 39, 176)', 'rgb(0, 188, 212)', 'rgb(255, 87, 34)', 'rgb(63, 81, 181)'
 ]
 
+# A vizualizáción legfeljebb ennyi legfrissebb cikk jelenik meg
+VISUALIZE_LIMIT = 2000
+
 translator = GoogleTranslator(source='auto', target='hu')
 
 # Adatbázis inicializálása
@@ -44,25 +46,15 @@ def init_db():
                      (id INTEGER PRIMARY KEY, country TEXT, title TEXT, link TEXT, published TEXT, sentiment TEXT, topic TEXT, region TEXT, political_bias TEXT, entities TEXT)''')
         conn.commit()
 
-# K-means klaszterezési függvény
-def perform_kmeans_clustering(titles, num_clusters=3):
-    # A szöveget TF-IDF jellemzőkké alakítjuk
-    vectorizer = TfidfVectorizer(stop_words='english')
-    X = vectorizer.fit_transform(titles)
-
-    # K-means klaszterezés alkalmazása
-    kmeans = KMeans(n_clusters=num_clusters, random_state=42)
-    kmeans.fit(X)
-
-    # Visszaadjuk a címkéket és a centroidokat
-    return kmeans.labels_, kmeans.cluster_centers_, X
-
 # Vizualizációs függvény Plotly segítségével
 def create_kmeans_visualization(titles, labels, num_clusters):
     traces = []
+    titles = np.asarray(titles, dtype=object)
+    labels = np.asarray(labels)
 
     for i in range(num_clusters):
-        cluster_points = [title for idx, title in enumerate(titles) if labels[idx] == i]
+        # Klaszterenként egy vektorizált szűrés, soronkénti Python-ciklus helyett
+        cluster_points = titles[labels == i].tolist()
         traces.append(go.Scatter(
             x=list(range(len(cluster_points))),
             y=[i] * len(cluster_points),  # Az y tengelyen a klaszter azonosítója van beállítva
@@ -86,56 +78,35 @@ def create_kmeans_visualization(titles, labels, num_clusters):
     fig = go.Figure(data=traces, layout=layout)
     return fig
 
-# Szociogram készítése NetworkX segítségével
-def create_social_network_graph(X, labels):
-    G = nx.Graph()
-    num_nodes = X.shape[0]
-
-    # Csomópontok hozzáadása a gráfhoz
-    for i in range(num_nodes):
-        G.add_node(i, label=f"Cím {i}: {labels[i]}")
-
-    # Élek hozzáadása a gráfhoz, a kapcsolatok erősségének ábrázolása érdekében
-    similarity_matrix = cosine_similarity(X)
-    for i in range(num_nodes):
-        for j in range(i + 1, num_nodes):
-            if similarity_matrix[i, j] > 0.1:  # Csak a jelentős kapcsolatok hozzáadása
-                G.add_edge(i, j, weight=similarity_matrix[i, j])
-
-    # Szociogram rajzolása
-    pos = nx.spring_layout(G)
-    plt.figure(figsize=(12, 12))
-    edges = G.edges(data=True)
-    weights = [edge[2]['weight'] for edge in edges]
-    nx.draw_networkx_nodes(G, pos, node_size=500, cmap=cm.get_cmap('viridis'))
-    nx.draw_networkx_edges(G, pos, edgelist=edges, width=[weight * 5 for weight in weights], alpha=0.5)
-    nx.draw_networkx_labels(G, pos, labels=nx.get_node_attributes(G, 'label'))
-    plt.title('Hírek Szociogramja Klaszterekkel')
-    plt.show()
-
 @app.route('/visualize')
 def visualize():
-    # Az összes cím lekérdezése az adatbázisból
-    with sqlite3.connect('news.db') as conn:
-        c = conn.cursor()
-        c.execute("SELECT title FROM news")
-        titles = [row[0] for row in c.fetchall()]
+    # A klasztereket az ingest futás számolja; a pillanatképből másolás nélkül olvassuk
+    snapshot = analytics_snapshot.load_snapshot()
+    if snapshot:
+        titles, labels = snapshot.clusters(limit=VISUALIZE_LIMIT)
+    else:
+        titles, labels = topic_clustering.load_clusters(limit=VISUALIZE_LIMIT)
 
-    # Klaszterezés végrehajtása
     if titles:
-        labels, centroids, X = perform_kmeans_clustering(titles, num_clusters=3)
+        num_clusters = topic_clustering.NUM_CLUSTERS
 
         # Vizualizáció létrehozása
-        fig = create_kmeans_visualization(titles, labels, num_clusters=3)
+        fig = create_kmeans_visualization(titles, labels, num_clusters=num_clusters)
         div = plotly.offline.plot(fig, include_plotlyjs=False, output_type='div')
 
-        # Szociogram készítése
-        create_social_network_graph(X, labels)
+        # A szociogramot az ingest futás rajzolja meg (social_graph.py), itt csak a legfrissebbet adjuk ki
+        graph_path = social_graph.latest_graph()
+        graph_url = '/social_graph/' + os.path.basename(graph_path) if graph_path else None
 
-        return render_template('visualization.html', plot_div=div)
+        return render_template('visualization.html', plot_div=div, graph_url=graph_url)
     else:
         return "<h3>Nincs elérhető hír a vizualizációhoz.</h3>"
 
+# A szociogram könyvtára (SOCIAL_GRAPH_DIR) a static mappán kívül is lehet
+@app.route('/social_graph/<path:name>')
+def social_graph_image(name):
+    return send_from_directory(social_graph.GRAPH_DIR, name)
+
 # HTML sablon a vizualizációhoz (templates/visualization.html)
 # Ezt a HTML fájlt a templates könyvtárban kell létrehozni
 """
@@ -155,4 +126,5 @@ def visualize():
 
 if __name__ == "__main__":
     init_db()
+    news_store.init_db()
     app.run(debug=True, port=5001, use_reloader=False)
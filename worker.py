@@ -0,0 +1,190 @@
+"""Ingest worker: runs queued per-feed jobs in a pool of processes.
+
+    python worker.py --processes 4                  # workers plus the scheduler
+    python worker.py --processes 8 --no-scheduler   # extra capacity on another host
+
+Any number of worker.py instances may run; the scheduler inside them elects a single
+leader through a lease in the queue database, so feeds are enqueued exactly once. The
+leader checks every minute which feeds are due according to poll_schedule, and queues
+a refresh of the analytics snapshot every SNAPSHOT_INTERVAL.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+import job_queue
+import metrics
+
+SCHEDULER_LEASE = 'ingest-scheduler'
+LEADER_TTL = 180  # seconds; renewed on every due-feed check
+DERIVED_DATA_DELAY = 60  # coalesce story/topic updates after a burst of feed jobs
+
+
+def worker_id(index):
+    return f'{socket.gethostname()}:{os.getpid()}:{index}'
+
+
+# Job handlers
+def run_job(conn, kind, payload):
+    import ingest
+
+    if kind == 'ingest_feed':
+        stats = ingest.ingest_feed(payload['url'], payload['country'])
+        if stats['inserted']:
+            job_queue.enqueue(conn, 'update_derived', {}, unique_key='update_derived', delay=DERIVED_DATA_DELAY)
+        return stats
+    if kind == 'update_derived':
+        return ingest.update_derived_data()
+    if kind == 'refresh_snapshot':
+        import analytics_snapshot
+        return analytics_snapshot.refresh_snapshot()
+    raise ValueError(f"Unknown job kind: {kind}")
+
+
+def work_loop(index, stop, poll_interval=2.0):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent coordinates shutdown
+    owner = worker_id(index)
+    conn = job_queue.connect()
+    while not stop.is_set():
+        job = job_queue.lease(conn, owner)
+        if job is None:
+            stop.wait(poll_interval)
+            continue
+        job_id, kind, payload, attempts = job
+        started = time.perf_counter()
+        try:
+            with metrics.profiled(f'job_{kind}'):
+                run_job(conn, kind, payload)
+            job_queue.complete(conn, job_id)
+            outcome = 'done'
+        except Exception as e:
+            logging.error(f"Job {job_id} ({kind}) failed on attempt {attempts}, error: {e}")
+            job_queue.fail(conn, job_id, attempts, str(e))
+            outcome = 'failed'
+        metrics.observe('job_seconds', time.perf_counter() - started, kind=kind, outcome=outcome)
+        metrics.flush()
+
+
+# Scheduler: only the current leader enqueues the feeds that are due
+def enqueue_feeds(conn):
+    import ingest
+    import poll_schedule
+
+    queued = 0
+    for country, feed_urls in poll_schedule.due_feeds(ingest.load_feeds()).items():
+        for feed_url in feed_urls:
+            if job_queue.enqueue(conn, 'ingest_feed', {'url': feed_url, 'country': country},
+                                 unique_key=f'feed:{feed_url}') is not None:
+                queued += 1
+    if queued:
+        logging.info(f"Scheduler: enqueued {queued} feed jobs, queue depth {job_queue.depth(conn)}")
+
+
+def start_scheduler(owner, check_seconds=60):
+    from datetime import datetime
+
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    import analytics_snapshot
+
+    def renew():
+        conn = job_queue.connect()
+        try:
+            return job_queue.acquire_leadership(conn, SCHEDULER_LEASE, owner, max(LEADER_TTL, 3 * check_seconds))
+        finally:
+            conn.close()
+
+    def tick():
+        if not renew():
+            return
+        conn = job_queue.connect()
+        try:
+            enqueue_feeds(conn)
+        finally:
+            conn.close()
+
+    # Picks up the rows of a burst whose update_derived came too soon after the last build
+    def snapshot():
+        if not renew():
+            return
+        conn = job_queue.connect()
+        try:
+            job_queue.enqueue(conn, 'refresh_snapshot', {}, unique_key='refresh_snapshot')
+        finally:
+            conn.close()
+
+    def purge():
+        conn = job_queue.connect()
+        try:
+            job_queue.purge_finished(conn)
+        finally:
+            conn.close()
+
+    # Every check also renews the leader lease
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(tick, 'interval', seconds=check_seconds, next_run_time=datetime.now())
+    scheduler.add_job(snapshot, 'interval', seconds=analytics_snapshot.SNAPSHOT_INTERVAL)
+    scheduler.add_job(purge, 'interval', hours=1)
+    scheduler.start()
+    return scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run ingest workers for the job queue.')
+    parser.add_argument('--processes', type=int, default=int(os.getenv('INGEST_WORKERS', 2)))
+    parser.add_argument('--check-every', type=int, default=60, help='seconds between due-feed checks')
+    parser.add_argument('--no-scheduler', action='store_true')
+    args = parser.parse_args()
+    # Fail here rather than in every feed job's first sentiment batch
+    if os.getenv('SENTIMENT_SERVER') and not os.getenv('SENTIMENT_SERVER_KEY'):
+        parser.error("SENTIMENT_SERVER needs SENTIMENT_SERVER_KEY")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+
+    import aggregates
+    import feed_fetcher
+    import feed_registry
+    import language
+    import near_duplicates
+    import news_store
+    import poll_schedule
+    import search_index
+    news_store.init_db()
+    aggregates.init_rollups()
+    near_duplicates.init_index()
+    search_index.init_search()
+    poll_schedule.init_schedule()
+    feed_registry.init_registry()
+    feed_registry.import_discovered()
+    language.init_languages()
+    feed_fetcher.init_validators()
+    job_queue.connect().close()
+
+    # Worker processes are started before any scheduler thread exists in this process
+    stop = multiprocessing.Event()
+    workers = [multiprocessing.Process(target=work_loop, args=(index, stop), name=f'ingest-worker-{index}')
+               for index in range(args.processes)]
+    for process in workers:
+        process.start()
+    scheduler = None if args.no_scheduler else start_scheduler(worker_id('scheduler'), args.check_every)
+
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        while not stop.is_set() and any(process.is_alive() for process in workers):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        if scheduler:
+            scheduler.shutdown(wait=False)
+        for process in workers:
+            process.join()
+
+
+if __name__ == '__main__':
+    main()